@@ -4,6 +4,7 @@ from __future__ import annotations
 import asyncio
 import logging
 import os
+from typing import Optional
 
 from dotenv import load_dotenv
 from aiogram import Bot, Dispatcher
@@ -25,7 +26,7 @@ load_dotenv(override=False)
 # -----------------------------------------------------------------------------
 # DB facade
 # -----------------------------------------------------------------------------
-from app import db as app_db  # provides init_db(), close_db(), get_con()
+from app.services import db as app_db  # provides init_db(), close_db(), get_con()
 
 # -----------------------------------------------------------------------------
 # i18n
@@ -87,6 +88,14 @@ async def run_polling() -> None:
     await app_db.init_db()
     logger.info("Database pool ready.")
 
+    # Warm the i18n language cache so t() skips the slow path for known users
+    try:
+        from app.services.i18n import preload_languages
+        n = await preload_languages()
+        logger.info("Preloaded %d user languages.", n)
+    except Exception as e:
+        logger.warning("preload_languages skipped: %s", e)
+
     # Optional compatibility hook
     try:
         import app.repositories.activity as repo_activity
@@ -97,6 +106,14 @@ async def run_polling() -> None:
     except Exception as e:
         logger.warning("ensure_activity_tables skipped: %s", e)
 
+    # Keep the admin tenant listings' stats view fresh
+    tenant_stats_task: Optional[asyncio.Task] = None
+    try:
+        from app.services.scheduler import start_tenant_stats_refresh_loop
+        tenant_stats_task = asyncio.create_task(start_tenant_stats_refresh_loop())
+    except Exception as e:
+        logger.warning("tenant_stats refresh loop not started: %s", e)
+
     # Make sure Telegram sends only the update types we actually use
     allowed = dp.resolve_used_update_types()
     logger.info("Allowed updates resolved: %s", allowed)
@@ -104,6 +121,27 @@ async def run_polling() -> None:
     logger.info("Start polling…")
     await dp.start_polling(bot, allowed_updates=allowed)
 
+    # Stop the refresh loop so it can't start a query on a closing pool
+    if tenant_stats_task is not None:
+        tenant_stats_task.cancel()
+        try:
+            await tenant_stats_task
+        except (asyncio.CancelledError, Exception):
+            pass
+
+    # Write out buffered stats counters before the pool goes away
+    try:
+        from app.repositories.stats import flush_stats_writes
+        await flush_stats_writes()
+    except Exception as e:
+        logger.warning("flush_stats_writes failed: %s", e)
+
+    try:
+        from app.repositories.subscriptions import flush_payment_audit
+        await flush_payment_audit()
+    except Exception as e:
+        logger.warning("flush_payment_audit failed: %s", e)
+
     try:
         await app_db.close_db()
     except Exception:
@@ -111,4 +149,9 @@ async def run_polling() -> None:
 
 
 if __name__ == "__main__":
+    try:
+        import uvloop  # optional; faster event loop when installed
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
     asyncio.run(run_polling())
@@ -2,7 +2,7 @@ from __future__ import annotations
 import os
 import io
 import re
-from typing import Optional, cast, List, Dict, Any
+from typing import Optional, cast, List
 
 from aiogram import F, Bot
 from aiogram.filters import Command
@@ -17,13 +17,14 @@ from aiogram.types import (
 )
 from aiogram.exceptions import TelegramBadRequest
 
-from ..repositories.users import count_all_users, count_premium_users
+from ..repositories.users import count_users
 from ..repositories.tenants import (
     count_active_tenants,
     list_tenants_page_with_stats,
     export_all_tenants_with_stats,
     get_tenant,
     search_tenants_page_with_stats,
+    TenantRow,
 )
 from ..repositories.chats import count_all_chats, list_tenant_chats
 from ..repositories.required import list_required_targets, add_required_target, remove_required_target
@@ -72,19 +73,28 @@ def _admin_kb(user_id: int) -> InlineKeyboardMarkup:
     ])
 
 
-def _tenants_nav_kb(user_id: int, page: int, has_prev: bool, has_next: bool) -> InlineKeyboardMarkup:
+def _tenants_nav_kb(
+    user_id: int,
+    first_id: Optional[str],
+    last_id: Optional[str],
+    has_prev: bool,
+    has_next: bool,
+) -> InlineKeyboardMarkup:
+    """
+    Prev/next carry the keyset cursor (first/last tenant id on the page).
+    """
     row = []
     row.append(
         InlineKeyboardButton(
             text=t("admin.tenants.prev", user_id=user_id),
-            callback_data=f"admin_tenants:page:{page-1}",
-        ) if has_prev else InlineKeyboardButton(text="—", callback_data="noop")
+            callback_data=f"admin_tenants:before:{first_id}",
+        ) if has_prev and first_id else InlineKeyboardButton(text="—", callback_data="noop")
     )
     row.append(
         InlineKeyboardButton(
             text=t("admin.tenants.next", user_id=user_id),
-            callback_data=f"admin_tenants:page:{page+1}",
-        ) if has_next else InlineKeyboardButton(text="—", callback_data="noop")
+            callback_data=f"admin_tenants:after:{last_id}",
+        ) if has_next and last_id else InlineKeyboardButton(text="—", callback_data="noop")
     )
     return InlineKeyboardMarkup(inline_keyboard=[
         row,
@@ -187,7 +197,7 @@ async def _edit_or_send(cb: CallbackQuery, text: str, kb: Optional[InlineKeyboar
     await cb.answer()
 
 
-def _build_pdf(rows: List[Dict[str, Any]]) -> tuple[bytes, str]:
+def _build_pdf(rows: List[TenantRow]) -> tuple[bytes, str]:
     """
     Build tenants export.
 
@@ -204,7 +214,7 @@ def _build_pdf(rows: List[Dict[str, Any]]) -> tuple[bytes, str]:
         buf = io.StringIO()
         buf.write("tenant_id,name,owner_tg_id,created_at,chat_count,plan\n")
         for r in rows:
-            buf.write(f"{r['id']},{r['name']},{r['owner_tg_id']},{r['created_at']},{r['chat_count']},{r['plan']}\n")
+            buf.write(f"{r.id},{r.name},{r.owner_tg_id},{r.created_at},{r.chat_count},{r.plan}\n")
         return buf.getvalue().encode("utf-8"), "tenants_export.csv"
 
     buf = io.BytesIO()
@@ -226,7 +236,7 @@ def _build_pdf(rows: List[Dict[str, Any]]) -> tuple[bytes, str]:
     c.setFont("Helvetica", 9)
 
     for r in rows:
-        vals = [r["id"], r["name"], str(r["owner_tg_id"]), r["created_at"], str(r["chat_count"]), r["plan"]]
+        vals = [r.id, r.name, str(r.owner_tg_id), r.created_at, str(r.chat_count), r.plan]
         from reportlab.lib.utils import simpleSplit as ss
         for i, v in enumerate(vals):
             lines = ss(v or "", "Helvetica", 9, 35 * mm if i == 1 else 30 * mm)
@@ -294,8 +304,7 @@ def register(dp):
         if not _authorized(cb.from_user.id if cb.from_user else None):
             await cb.answer()
             return
-        total_users = await count_all_users()
-        premium_users = await count_premium_users()
+        total_users, premium_users = await count_users()
         active_tenants = await count_active_tenants()
         chats = await count_all_chats()
         text = (
@@ -316,29 +325,39 @@ def register(dp):
         if not _authorized(cb.from_user.id if cb.from_user else None):
             await cb.answer()
             return
-        parts = (cb.data or "").split(":")
-        page = int(parts[-1]) if parts and parts[-2] == "page" else 0
-        offset = page * PAGE_SIZE
-        tenants = await list_tenants_page_with_stats(PAGE_SIZE + 1, offset)
-        has_next = len(tenants) > PAGE_SIZE
-        tenants = tenants[:PAGE_SIZE]
-        has_prev = page > 0
+        # admin_tenants:page:0 (first page) | admin_tenants:after:<id> | admin_tenants:before:<id>
+        parts = (cb.data or "").split(":", 2)
+        mode = parts[1] if len(parts) == 3 else "page"
+        cursor = parts[2] if len(parts) == 3 else ""
+        if mode == "after" and cursor:
+            tenants = await list_tenants_page_with_stats(PAGE_SIZE + 1, after_id=cursor)
+            has_prev, has_next = True, len(tenants) > PAGE_SIZE
+            tenants = tenants[:PAGE_SIZE]
+        elif mode == "before" and cursor:
+            tenants = await list_tenants_page_with_stats(PAGE_SIZE + 1, before_id=cursor)
+            has_prev, has_next = len(tenants) > PAGE_SIZE, True
+            tenants = tenants[-PAGE_SIZE:]
+        else:
+            tenants = await list_tenants_page_with_stats(PAGE_SIZE + 1)
+            has_prev, has_next = False, len(tenants) > PAGE_SIZE
+            tenants = tenants[:PAGE_SIZE]
 
         if not tenants:
             text = t("admin.tenants.none", user_id=cb.from_user.id)
-            await _edit_or_send(cb, text, _tenants_nav_kb(cb.from_user.id, page, has_prev, has_next))
+            await _edit_or_send(cb, text, _tenants_nav_kb(cb.from_user.id, None, None, False, False))
             return
+        first_id, last_id = tenants[0].id, tenants[-1].id
 
         lines = [t("admin.tenants.title_latest", user_id=cb.from_user.id)]
         kb_rows = []
         for t_row in tenants:
-            tid = t_row["id"]
-            summary = f"{t_row['name']} — owner {t_row['owner_tg_id']} — {t_row['chat_count']} chats — plan {t_row['plan']} — {t_row['created_at']}"
+            tid = t_row.id
+            summary = f"{t_row.name} — owner {t_row.owner_tg_id} — {t_row.chat_count} chats — plan {t_row.plan} — {t_row.created_at}"
             lines.append(f"• {summary}")
             kb_rows.append([InlineKeyboardButton(text=summary, callback_data=f"tenant_view:{tid}")])
 
         kb = InlineKeyboardMarkup(
-            inline_keyboard=kb_rows + _tenants_nav_kb(cb.from_user.id, page, has_prev, has_next).inline_keyboard
+            inline_keyboard=kb_rows + _tenants_nav_kb(cb.from_user.id, first_id, last_id, has_prev, has_next).inline_keyboard
         )
         await _edit_or_send(cb, "\n".join(lines), kb)
 
@@ -362,13 +381,14 @@ def register(dp):
         lines = [t("admin.tenants.search_title", user_id=msg.from_user.id, q=q)]
         kb_rows = []
         for t_row in tenants:
-            tid = t_row["id"]
-            summary = f"{t_row['name']} — owner {t_row['owner_tg_id']} — {t_row['chat_count']} chats — plan {t_row['plan']} — {t_row['created_at']}"
+            tid = t_row.id
+            summary = f"{t_row.name} — owner {t_row.owner_tg_id} — {t_row.chat_count} chats — plan {t_row.plan} — {t_row.created_at}"
             lines.append(f"• {summary}")
             kb_rows.append([InlineKeyboardButton(text=summary, callback_data=f"tenant_view:{tid}")])
         if not tenants:
             lines.append(t("admin.tenants.no_results", user_id=msg.from_user.id))
-        nav = _tenants_nav_kb(msg.from_user.id, 0, False, has_next)
+        last_id = tenants[-1].id if tenants else None
+        nav = _tenants_nav_kb(msg.from_user.id, None, last_id, False, has_next)
         await msg.answer(
             "\n".join(lines),
             reply_markup=InlineKeyboardMarkup(inline_keyboard=kb_rows + nav.inline_keyboard),
@@ -547,7 +567,7 @@ def register(dp):
     dp.message.register(admin_command, Command("admin"))
     dp.callback_query.register(admin_overview, F.data == "admin_overview")
 
-    dp.callback_query.register(admin_tenants_list, F.data.startswith("admin_tenants:page:"))
+    dp.callback_query.register(admin_tenants_list, F.data.startswith("admin_tenants:"))
     dp.callback_query.register(admin_tenants_search, F.data == "admin_tenants_search")
     dp.message.register(search_query_received, AdminStates.waiting_tenant_search)
 
@@ -14,7 +14,7 @@ from aiogram.fsm.state import State, StatesGroup
 from aiogram.fsm.context import FSMContext
 from aiogram.exceptions import TelegramBadRequest
 
-from app.db import get_con
+from app.services.db import get_con
 from app.repositories.plans import (
     list_plans,
     get_plan_by_code,
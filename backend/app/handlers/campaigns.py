@@ -17,7 +17,7 @@ from aiogram.filters import Command
 from aiogram.enums.chat_type import ChatType
 
 # 🔁 Use relative imports (like in start.py)
-from ..db import get_con
+from ..services.db import get_con
 from ..repositories.subscriptions import get_user_subscription_status
 from ..repositories.campaign_links import (
     create_campaign_link_record,
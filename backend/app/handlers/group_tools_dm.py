@@ -7,7 +7,7 @@ from aiogram import Router, F, Bot
 from aiogram.types import CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton, Message
 from aiogram.enums.chat_type import ChatType
 
-from app.db import get_con
+from app.services.db import get_con
 from app.repositories.subscriptions import get_user_subscription_status
 from app.repositories.required import add_group_target, list_group_targets, clear_group_targets
 from app.services.i18n import t  # ← i18n
@@ -6,6 +6,7 @@ from datetime import datetime, timezone, date, timedelta
 from typing import Optional, Set
 import asyncio
 import time
+from collections import OrderedDict, defaultdict, deque
 
 from aiogram import F
 from aiogram.types import (
@@ -18,8 +19,9 @@ from aiogram.types import (
 )
 from aiogram.enums.chat_type import ChatType
 
-from app.db import get_con
+from app.services.db import get_con
 from app.repositories.stats import (
+    has_pending_event,
     inc_join,
     inc_leave,
     record_event,
@@ -44,8 +46,8 @@ JOIN_WINDOW_SECONDS = 30
 RAID_THRESHOLD = 30              # joins per JOIN_WINDOW_SECONDS
 RAID_DURATION_SECONDS = 5 * 60   # raid mode lasts 5 minutes
 
-# chat_id -> list[join_timestamps]
-_JOIN_HISTORY: dict[int, list[float]] = {}
+# chat_id -> the last RAID_THRESHOLD join timestamps (older ones fall off)
+_JOIN_HISTORY: defaultdict[int, deque[float]] = defaultdict(lambda: deque(maxlen=RAID_THRESHOLD))
 # chat_id -> raid_mode_until (monotonic time)
 _RAID_MODE_UNTIL: dict[int, float] = {}
 
@@ -61,18 +63,18 @@ def _record_join_and_check_raid(chat_id: int) -> bool:
     Record a join timestamp for this chat and decide if raid mode is active.
     """
     now = time.monotonic()
-    history = _JOIN_HISTORY.get(chat_id, [])
+    history = _JOIN_HISTORY[chat_id]
     history.append(now)
-    cutoff = now - JOIN_WINDOW_SECONDS
-    history = [t for t in history if t >= cutoff]
-    _JOIN_HISTORY[chat_id] = history
 
-    # trigger raid mode if threshold exceeded
-    if len(history) >= RAID_THRESHOLD:
+    # trigger raid mode if threshold exceeded: it's a raid when the
+    # RAID_THRESHOLD-th most recent join is still inside the window. The
+    # deque's maxlen means nothing ever needs trimming.
+    if len(history) >= RAID_THRESHOLD and history[-RAID_THRESHOLD] >= now - JOIN_WINDOW_SECONDS:
         _RAID_MODE_UNTIL[chat_id] = now + RAID_DURATION_SECONDS
         return True
 
-    return _is_in_raid_mode(chat_id)
+    # same as _is_in_raid_mode(), reusing this call's clock read
+    return now < _RAID_MODE_UNTIL.get(chat_id, 0.0)
 
 
 # ---------------- Raid detection for JOIN REQUESTS (private groups) ----------------
@@ -82,35 +84,101 @@ REQ_WINDOW_SECONDS = 30
 REQ_THRESHOLD = 30               # requests per REQ_WINDOW_SECONDS
 REQ_RAID_DURATION_SECONDS = 5 * 60  # 5 minutes
 
-# chat_id -> list[request_timestamps]
-_REQ_HISTORY: dict[int, list[float]] = {}
-# chat_id -> request-raid-mode-until (monotonic time)
-_REQ_RAID_UNTIL: dict[int, float] = {}
+class _ChatRaidState:
+    """Per-chat join-request raid state: recent timestamps + raid end."""
+
+    __slots__ = ("history", "raid_until")
+
+    def __init__(self) -> None:
+        # the last REQ_THRESHOLD request timestamps (older ones fall off)
+        self.history: deque[float] = deque(maxlen=REQ_THRESHOLD)
+        # request-raid-mode-until (monotonic time); 0.0 = never
+        self.raid_until = 0.0
+
+
+# chat_id -> _ChatRaidState; one lookup per join request. Kept in LRU order
+# (least recently active chat first) so the sweep only looks at the front.
+_REQ_STATE: OrderedDict[int, _ChatRaidState] = OrderedDict()
+# Latest raid_until over all chats, reset to 0.0 once it has passed. While it
+# is 0.0 no chat can be in request-raid mode, so the common check skips the
+# dict lookup and the clock read.
+_req_raid_horizon = 0.0
+
+_monotonic = time.monotonic
+
+# One entry per chat that ever sent a request; every few windows evict the
+# ones that can no longer matter so memory tracks active chats, not all
+# chats. A chat idle for longer than both the window and the raid duration
+# has a useless history and no running raid (a raid starts at a request).
+_REQ_SWEEP_INTERVAL = REQ_WINDOW_SECONDS * 4
+_REQ_IDLE_SECONDS = max(REQ_WINDOW_SECONDS, REQ_RAID_DURATION_SECONDS)
+_req_next_sweep = 0.0
+
+
+def _req_sweep(now: float) -> None:
+    global _req_next_sweep
+    _req_next_sweep = now + _REQ_SWEEP_INTERVAL
+    cutoff = now - _REQ_IDLE_SECONDS
+    # LRU order: stop at the first chat that is still active.
+    while _REQ_STATE:
+        st = next(iter(_REQ_STATE.values()))
+        if st.history and st.history[-1] >= cutoff:
+            break
+        _REQ_STATE.popitem(last=False)
 
 
 def _req_is_in_raid_mode(chat_id: int) -> bool:
-    now = time.monotonic()
-    until = _REQ_RAID_UNTIL.get(chat_id, 0.0)
-    return now < until
+    """
+    Standalone check. Right after recording a request, use the recorder's
+    return value instead: it already answers this from the same state.
+    """
+    global _req_raid_horizon
+    if not _req_raid_horizon:
+        return False
+    now = _monotonic()
+    if now >= _req_raid_horizon:
+        # every raid has ended
+        _req_raid_horizon = 0.0
+        return False
+    st = _REQ_STATE.get(chat_id)
+    return st is not None and now < st.raid_until
 
 
 def _record_join_request_and_check_raid(chat_id: int) -> bool:
     """
     Record a join-request timestamp for this chat and decide if request-raid mode is active.
     """
-    now = time.monotonic()
-    history = _REQ_HISTORY.get(chat_id, [])
+    global _req_raid_horizon
+    now = _monotonic()
+    if now >= _req_next_sweep:
+        _req_sweep(now)
+    st = _REQ_STATE.get(chat_id)
+    if st is None:
+        st = _REQ_STATE[chat_id] = _ChatRaidState()
+    else:
+        _REQ_STATE.move_to_end(chat_id)
+    thr = REQ_THRESHOLD
+    history = st.history
     history.append(now)
-    cutoff = now - REQ_WINDOW_SECONDS
-    history = [t for t in history if t >= cutoff]
-    _REQ_HISTORY[chat_id] = history
 
-    # trigger raid mode for join requests
-    if len(history) >= REQ_THRESHOLD:
-        _REQ_RAID_UNTIL[chat_id] = now + REQ_RAID_DURATION_SECONDS
+    # trigger raid mode for join requests (same bounded-deque check as joins)
+    if len(history) >= thr and history[-thr] >= now - REQ_WINDOW_SECONDS:
+        st.raid_until = until = now + REQ_RAID_DURATION_SECONDS
+        if until > _req_raid_horizon:
+            _req_raid_horizon = until
         return True
 
-    return _req_is_in_raid_mode(chat_id)
+    return now < st.raid_until
+
+
+def reset_raid_state() -> None:
+    """Forget all join and join-request raid state (tests, admin resets)."""
+    global _req_raid_horizon, _req_next_sweep
+    _JOIN_HISTORY.clear()
+    _RAID_MODE_UNTIL.clear()
+    _REQ_STATE.clear()
+    _req_raid_horizon = 0.0
+    _req_next_sweep = 0.0
 
 
 async def _delete_message_later(bot, chat_id: int, message_id: int, delay: int = 120) -> None:
@@ -327,6 +395,9 @@ async def _recent_member_event_exists(
     for this chat + user in the last `window_seconds`.
     """
     since = _now() - timedelta(seconds=window_seconds)
+    # Events are written behind; check the not-yet-flushed ones first.
+    if has_pending_event(chat_id, user_id, kind, since):
+        return True
     async with get_con() as con:
         row = await con.fetchrow(
             """
@@ -17,7 +17,7 @@ from aiogram.types import (
 )
 from aiogram.exceptions import TelegramBadRequest  # aiogram v3
 
-from app.db import get_con
+from app.services.db import get_con
 from app.repositories.plans import list_active_plans, get_plan_by_code
 from app.repositories.subscriptions import (
     get_user_subscription_status,
@@ -6,7 +6,7 @@ from aiogram import Router, F, Bot
 from aiogram.types import CallbackQuery, BufferedInputFile, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.exceptions import TelegramBadRequest
 
-from app.db import get_con
+from app.services.db import get_con
 from app.repositories.subscriptions import get_user_subscription_status
 from app.services.i18n import t
 from app.services.reports import build_report_pdf_bytes
@@ -18,7 +18,7 @@ from aiogram.types import (
     ChatPermissions,
 )
 
-from ..db import get_con
+from ..services.db import get_con
 from ..repositories.pending_verification import mark_verified_for_user
 from ..repositories.users import upsert_user, has_phone, get_language, set_language
 from ..repositories.tenants import ensure_personal_tenant, link_user_to_tenant, get_user_tenant
@@ -2,7 +2,7 @@ from __future__ import annotations
 from typing import List, Tuple, Optional
 from datetime import datetime
 
-from app.db import get_con
+from app.services.db import get_con
 
 # ---------- Writers ----------
 async def record_message_event(chat_id: int, user_id: int, happened_at: datetime) -> None:
@@ -46,8 +46,8 @@ async def get_messages_daily(chat_id: int, days: int = 7) -> List[Tuple[str, int
               ) x
               GROUP BY 1
             )
-            SELECT to_char(days.day,'YYYY-MM-DD') AS d,
-                   COALESCE(md.message_count, by_user.total, evt.total, 0) AS count
+            SELECT days.day AS d,
+                   COALESCE(md.message_count, by_user.total, evt.total, 0)::int AS count
             FROM days
             LEFT JOIN messages_daily md
               ON md.chat_id = $1 AND md.date = days.day
@@ -57,7 +57,7 @@ async def get_messages_daily(chat_id: int, days: int = 7) -> List[Tuple[str, int
             """,
             chat_id, days
         )
-    return [(r["d"], int(r["count"])) for r in rows]
+    return [(r["d"], r["count"]) for r in rows]
 
 async def get_dau_daily(chat_id: int, days: int = 7) -> List[Tuple[str, int]]:
     async with get_con() as con:
@@ -68,27 +68,27 @@ async def get_dau_daily(chat_id: int, days: int = 7) -> List[Tuple[str, int]]:
               FROM generate_series(current_date - ($2::int - 1), current_date, interval '1 day') AS d
             ),
             per_day AS (
-              SELECT date AS day, COUNT(DISTINCT user_id) AS dau
+              SELECT date AS day, COUNT(DISTINCT user_id)::int AS dau
               FROM dau_daily
               WHERE chat_id = $1
                 AND date >= current_date - ($2::int - 1)
               GROUP BY date
             )
-            SELECT to_char(days.day,'YYYY-MM-DD') AS d,
-                   COALESCE(per_day.dau, 0) AS count
+            SELECT days.day AS d,
+                   COALESCE(per_day.dau, 0)::int AS count
             FROM days
             LEFT JOIN per_day ON per_day.day = days.day
             ORDER BY days.day DESC
             """,
             chat_id, days
         )
-    return [(r["d"], int(r["count"])) for r in rows]
+    return [(r["d"], r["count"]) for r in rows]
 
 async def get_top_talkers(chat_id: int, *, days: int = 7, limit: int = 5) -> List[Tuple[int, int]]:
     async with get_con() as con:
         rows = await con.fetch(
             """
-            SELECT user_id, SUM(message_count) AS total
+            SELECT user_id, SUM(message_count)::int AS total
             FROM messages_by_user_daily
             WHERE chat_id = $1
               AND date >= current_date - ($2::int - 1)
@@ -99,7 +99,7 @@ async def get_top_talkers(chat_id: int, *, days: int = 7, limit: int = 5) -> Lis
             chat_id, days, limit
         )
         if rows:
-            return [(int(r["user_id"]), int(r["total"])) for r in rows]
+            return [(r["user_id"], r["total"]) for r in rows]
         rows2 = await con.fetch(
             """
             SELECT tg_id AS user_id, COUNT(*)::int AS total
@@ -112,13 +112,13 @@ async def get_top_talkers(chat_id: int, *, days: int = 7, limit: int = 5) -> Lis
             """,
             chat_id, days, limit
         )
-    return [(int(r["user_id"]), int(r["total"])) for r in rows2]
+    return [(r["user_id"], r["total"]) for r in rows2]
 
 async def get_most_active_user(chat_id: int, *, days: int = 30) -> Optional[Tuple[int, int]]:
     async with get_con() as con:
         row = await con.fetchrow(
             """
-            SELECT user_id, SUM(message_count) AS total
+            SELECT user_id, SUM(message_count)::int AS total
             FROM messages_by_user_daily
             WHERE chat_id = $1
               AND date >= current_date - ($2::int - 1)
@@ -129,7 +129,7 @@ async def get_most_active_user(chat_id: int, *, days: int = 30) -> Optional[Tupl
             chat_id, days
         )
         if row:
-            return int(row["user_id"]), int(row["total"])
+            return row["user_id"], row["total"]
         row2 = await con.fetchrow(
             """
             SELECT tg_id AS user_id, COUNT(*)::int AS total
@@ -143,21 +143,21 @@ async def get_most_active_user(chat_id: int, *, days: int = 30) -> Optional[Tupl
             chat_id, days
         )
     if row2:
-        return int(row2["user_id"]), int(row2["total"])
+        return row2["user_id"], row2["total"]
     return None
 
 async def get_peak_hour(chat_id: int, *, days: int = 30, tz: str = 'UTC') -> Optional[Tuple[int, int]]:
     async with get_con() as con:
         row = await con.fetchrow(
-            f"""
+            """
             WITH u AS (
-              SELECT EXTRACT(HOUR FROM happened_at AT TIME ZONE '{tz}')::int AS hour
+              SELECT EXTRACT(HOUR FROM happened_at AT TIME ZONE $3::text)::int AS hour
               FROM messages_by_user
               WHERE chat_id = $1
                 AND happened_at >= now() - ($2::int) * interval '1 day'
             ),
             c AS (
-              SELECT EXTRACT(HOUR FROM happened_at AT TIME ZONE '{tz}')::int AS hour
+              SELECT EXTRACT(HOUR FROM happened_at AT TIME ZONE $3::text)::int AS hour
               FROM messages_stream
               WHERE chat_id = $1
                 AND happened_at >= now() - ($2::int) * interval '1 day'
@@ -173,11 +173,11 @@ async def get_peak_hour(chat_id: int, *, days: int = 30, tz: str = 'UTC') -> Opt
             ORDER BY cnt DESC, hour ASC
             LIMIT 1
             """,
-            chat_id, days
+            chat_id, days, tz
         )
     if not row:
         return None
-    return int(row["hour"]), int(row["cnt"])
+    return row["hour"], row["cnt"]
 
 async def get_active_users_window(chat_id: int, days: int = 30) -> int:
     """
@@ -187,11 +187,11 @@ async def get_active_users_window(chat_id: int, days: int = 30) -> int:
     async with get_con() as con:
         row = await con.fetchrow(
             """
-            SELECT COUNT(DISTINCT user_id) AS c
+            SELECT COUNT(DISTINCT user_id)::int AS c
             FROM dau_daily
             WHERE chat_id = $1
               AND date >= current_date - ($2::int - 1)
             """,
             chat_id, days
         )
-    return int(row["c"]) if row and row["c"] is not None else 0
+    return row["c"] if row else 0
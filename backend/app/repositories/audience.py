@@ -1,7 +1,7 @@
 # backend/app/repositories/audience.py
 from __future__ import annotations
 from typing import List
-from app.db import get_con
+from app.services.db import get_con
 
 """
 Audience = distinct users who:
@@ -4,7 +4,7 @@ from typing import List, Dict, Optional
 from urllib.parse import urlparse
 import re
 
-from app.db import get_con
+from app.services.db import get_con
 
 # Normalize and extract the invite code to make matching resilient.
 # Handles: https://t.me/+CODE or https://t.me/joinchat/CODE (and without scheme).
@@ -1,7 +1,7 @@
 # backend/app/repositories/campaigns_read.py
 from __future__ import annotations
 from typing import List, Tuple
-from app.db import get_con
+from app.services.db import get_con
 
 async def get_top_campaigns_30d(chat_id: int, limit: int = 5) -> List[Tuple[str, int]]:
     """
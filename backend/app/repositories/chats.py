@@ -1,12 +1,17 @@
 from __future__ import annotations
-from typing import List, Tuple, Optional
-import app.db as app_db
+from typing import Dict, List, Tuple, Optional
+import time
+import app.services.db as app_db
 
 # Schema (public.chats):
 # tg_chat_id BIGINT PK, tenant_id UUID NULL, type TEXT NOT NULL,
 # title TEXT NULL, created_at TIMESTAMPTZ DEFAULT now(),
 # chat_type TEXT NULL, linked_at TIMESTAMPTZ DEFAULT now()
 
+# chat_id -> (fetched_at monotonic, tenant_id); read on every group update
+_CHAT_TENANT_TTL = 60.0
+_chat_tenant_cache: Dict[int, Tuple[float, Optional[str]]] = {}
+
 # ---------- Existing functions ----------
 
 async def upsert_chat(
@@ -29,6 +34,7 @@ async def upsert_chat(
             """,
             tg_chat_id, tenant_id, title, chat_type,
         )
+    _chat_tenant_cache.pop(tg_chat_id, None)
 
 async def list_tenant_chats(tenant_id: str) -> List[Tuple[int, str, str]]:
     async with app_db.get_con() as con:
@@ -57,12 +63,20 @@ async def chat_exists(tg_chat_id: int) -> bool:
     return bool(row)
 
 async def get_chat_tenant(tg_chat_id: int) -> Optional[str]:
+    """
+    Cached for _CHAT_TENANT_TTL seconds; upsert_chat() invalidates the entry.
+    """
+    cached = _chat_tenant_cache.get(tg_chat_id)
+    if cached is not None and time.monotonic() - cached[0] < _CHAT_TENANT_TTL:
+        return cached[1]
     async with app_db.get_con() as con:
         row = await con.fetchrow(
             "select tenant_id from public.chats where tg_chat_id = $1",
             tg_chat_id,
         )
-    return str(row["tenant_id"]) if row and row["tenant_id"] is not None else None
+    tenant_id = str(row["tenant_id"]) if row and row["tenant_id"] is not None else None
+    _chat_tenant_cache[tg_chat_id] = (time.monotonic(), tenant_id)
+    return tenant_id
 
 # ---------- New helpers (needed by scheduler) ----------
 
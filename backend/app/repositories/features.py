@@ -1,6 +1,6 @@
 from __future__ import annotations
 from typing import Optional
-import app.db as app_db
+import app.services.db as app_db
 
 # Table: public.tenant_features
 # Columns:
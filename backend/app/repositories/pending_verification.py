@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime, timezone
 from typing import List, Tuple
 
-from app.db import get_con
+from app.services.db import get_con
 
 
 async def add_pending_verification(chat_id: int, user_id: int, ttl_seconds: int = 120) -> None:
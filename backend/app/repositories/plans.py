@@ -3,7 +3,7 @@ from __future__ import annotations
 
 from typing import List, Dict, Optional
 
-from app.db import get_con
+from app.services.db import get_con
 
 __all__ = [
     "list_active_plans",
@@ -4,7 +4,7 @@ import secrets
 import string
 from typing import Optional, Tuple, List
 
-from app.db import get_con
+from app.services.db import get_con
 
 # ---------- helpers ----------
 
@@ -92,28 +92,68 @@ async def count_referred(customer_tg_id: int) -> int:
         )
     return int(row["c"]) if row else 0
 
-async def count_referred_with_filters(
-    customer_tg_id: int,
-    has_phone: bool | None,
-    min_username_len: int,
-    min_name_len: int
-) -> int:
+def _referred_where(has_phone: bool | None, by_username: bool, by_name: bool) -> str:
     where = ["referred_by = $1"]
-    params = [customer_tg_id]
+    n = 1
     if has_phone is True:
         where.append("phone_e164 is not null")
     elif has_phone is False:
         where.append("phone_e164 is null")
-    if min_username_len > 0:
-        where.append("username is not null and char_length(username) >= $%d" % (len(params)+1))
+    if by_username:
+        n += 1
+        where.append("username is not null and char_length(username) >= $%d" % n)
+    if by_name:
+        n += 1
+        where.append("char_length(coalesce(first_name,'')||coalesce(last_name,'')) >= $%d" % n)
+    return " and ".join(where)
+
+# One fixed SQL text per filter shape (has_phone, by_username, by_name), so
+# asyncpg's per-connection statement cache holds 12 entries instead of a new
+# text per call.
+_FILTER_SHAPES = [
+    (has_phone, by_username, by_name)
+    for has_phone in (None, True, False)
+    for by_username in (False, True)
+    for by_name in (False, True)
+]
+
+_SQL_COUNT_REFERRED = {
+    shape: "select count(*) as c from public.users where " + _referred_where(*shape)
+    for shape in _FILTER_SHAPES
+}
+
+_SQL_SELECT_REFERRED = {
+    shape: (
+        "select tg_id from public.users where " + _referred_where(*shape)
+        + " order by coalesce(last_seen_at, created_at) desc"
+        + " limit $%d" % (2 + shape[1] + shape[2])
+    )
+    for shape in _FILTER_SHAPES
+}
+
+def _filter_params(
+    customer_tg_id: int,
+    has_phone: bool | None,
+    min_username_len: int,
+    min_name_len: int,
+) -> Tuple[Tuple[bool | None, bool, bool], List[int]]:
+    shape = (has_phone, min_username_len > 0, min_name_len > 0)
+    params = [customer_tg_id]
+    if shape[1]:
         params.append(min_username_len)
-    if min_name_len > 0:
-        where.append("char_length(coalesce(first_name,'')||coalesce(last_name,'')) >= $%d" % (len(params)+1))
+    if shape[2]:
         params.append(min_name_len)
+    return shape, params
 
-    sql = f"select count(*) as c from public.users where {' and '.join(where)}"
+async def count_referred_with_filters(
+    customer_tg_id: int,
+    has_phone: bool | None,
+    min_username_len: int,
+    min_name_len: int
+) -> int:
+    shape, params = _filter_params(customer_tg_id, has_phone, min_username_len, min_name_len)
     async with get_con() as con:
-        row = await con.fetchrow(sql, *params)
+        row = await con.fetchrow(_SQL_COUNT_REFERRED[shape], *params)
     return int(row["c"]) if row else 0
 
 async def select_user_ids_for_customer(
@@ -123,28 +163,10 @@ async def select_user_ids_for_customer(
     min_name_len: int,
     limit: int | None = None
 ) -> List[int]:
-    where = ["referred_by = $1"]
-    params = [customer_tg_id]
-    if has_phone is True:
-        where.append("phone_e164 is not null")
-    elif has_phone is False:
-        where.append("phone_e164 is null")
-    if min_username_len > 0:
-        where.append("username is not null and char_length(username) >= $%d" % (len(params)+1))
-        params.append(min_username_len)
-    if min_name_len > 0:
-        where.append("char_length(coalesce(first_name,'')||coalesce(last_name,'')) >= $%d" % (len(params)+1))
-        params.append(min_name_len)
-
-    sql = f"""
-        select tg_id
-        from public.users
-        where {' and '.join(where)}
-        order by coalesce(last_seen_at, created_at) desc
-        { 'limit %d' % limit if limit else '' }
-    """
+    shape, params = _filter_params(customer_tg_id, has_phone, min_username_len, min_name_len)
+    # LIMIT NULL means "no limit" in Postgres
     async with get_con() as con:
-        rows = await con.fetch(sql, *params)
+        rows = await con.fetch(_SQL_SELECT_REFERRED[shape], *params, limit or None)
     return [int(r["tg_id"]) for r in rows]
 
 # ---- owner helpers (for later step) ----
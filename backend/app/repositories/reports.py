@@ -1,111 +1,56 @@
+# backend/app/repositories/reports.py
 from __future__ import annotations
-from typing import Optional, cast
-
-from aiogram import Router, F, Bot
-from aiogram.types import CallbackQuery, BufferedInputFile
-from aiogram.exceptions import TelegramBadRequest
-
-from app.db import get_con
-from app.repositories.subscriptions import get_user_subscription_status
-from app.services.i18n import t
-from app.services.reports import build_report_pdf_bytes
-
-router = Router()
-
-async def _user_owns_chat(user_tg_id: int, chat_id: int) -> bool:
-    async with get_con() as con:
-        row = await con.fetchrow(
-            """
-            SELECT 1
-            FROM public.chats c
-            JOIN public.user_tenants ut ON ut.tenant_id = c.tenant_id
-            WHERE ut.tg_id = $1 AND c.tg_chat_id = $2
-            LIMIT 1
-            """,
-            user_tg_id, chat_id
-        )
-    return bool(row)
-
-async def _get_chat_title(chat_id: int) -> Optional[str]:
-    async with get_con() as con:
-        row = await con.fetchrow("SELECT title FROM public.chats WHERE tg_chat_id = $1 LIMIT 1", chat_id)
-    return (row and row["title"]) or None
-
-@router.callback_query(F.data.startswith("rep:chat:"))
-async def on_generate_report(cb: CallbackQuery):
-    if not cb.from_user:
-        return await cb.answer()
-
-    parts = (cb.data or "").split(":")
-    try:
-        chat_id = int(parts[2])
-        days = int(parts[3]) if len(parts) >= 4 else 30
-    except Exception:
-        try:
-            await cb.answer(t("reports.ui.invalid_request", user_id=(cb.from_user and cb.from_user.id)), show_alert=True)
-        except TelegramBadRequest:
-            pass
-        return
-
-    uid = cb.from_user.id
-
-    if not await _user_owns_chat(uid, chat_id):
-        try:
-            await cb.answer(t("reports.ui.not_allowed", user_id=uid), show_alert=True)
-        except TelegramBadRequest:
-            pass
-        return
-
-    plan = await get_user_subscription_status(uid)
-    if str(plan).lower() != "pro":
-        try:
-            await cb.answer(t("reports.errors.pro_only", user_id=uid), show_alert=True)
-        except TelegramBadRequest:
-            pass
-        return
-
-    title = await _get_chat_title(chat_id)
-
-    try:
-        if cb.message:
-            await cb.message.edit_text(t("reports.ui.generating", user_id=uid))
-    except Exception:
-        pass
-
-    try:
-        pdf_bytes, filename = await build_report_pdf_bytes(
-            chat_id=chat_id,
-            chat_title=title,
-            days=days,
-            is_pro=True,            # double-enforced inside service
-            user_id=uid,
-            lang=None,              # service will resolve from user if set
-            tz="Europe/Helsinki",
-        )
-    except PermissionError as e:
-        try:
-            await cb.message.edit_text(str(e))
-        except Exception:
-            pass
-        return
-    except Exception as e:
-        try:
-            await cb.message.edit_text(t("reports.ui.failed", user_id=uid, err=str(e)))
-        except Exception:
-            pass
-        return
-
-    try:
-        file = BufferedInputFile(pdf_bytes, filename=filename)
-        caption = t("reports.ui.sent_caption", user_id=uid, title=(title or str(chat_id)), days=days)
-        bot = cast(Bot, cb.bot)
-        await bot.send_document(cb.message.chat.id, document=file, caption=caption)
-        try:
-            await cb.answer(t("reports.ui.done", user_id=uid))
-        except TelegramBadRequest:
-            pass
-    except Exception:
-        try:
-            await cb.message.edit_text(t("reports.ui.sent_no_file", user_id=uid))
-        except Exception:
-            pass
+import asyncio
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from app.repositories.stats import get_last_days
+from app.repositories.activity import (
+    get_messages_daily,
+    get_dau_daily,
+    get_top_talkers,
+    get_peak_hour,
+)
+from app.repositories.campaigns_read import get_top_campaigns_30d
+
+# Messages / DAU are fetched as two 30-day windows (current vs previous).
+REPORT_SERIES_DAYS = 60
+REPORT_TOP_DAYS = 30
+
+@dataclass(slots=True)
+class ReportBundle:
+    """Everything the chat PDF report reads, newest-first where it's a series."""
+    joins_leaves: List[Tuple[str, int, int]]
+    messages: List[Tuple[str, int]]
+    dau: List[Tuple[str, int]]
+    top_talkers: List[Tuple[int, int]]
+    top_campaigns: List[Tuple[str, int]]
+    peak_hour: Optional[Tuple[int, int]]
+    top_user: Optional[Tuple[int, int]]
+
+async def get_report_bundle(chat_id: int, window_days: int, tz: str = "UTC") -> ReportBundle:
+    """
+    Fetch all report data for one chat. The queries run concurrently on
+    separate pooled connections (asyncpg can't multiplex one connection), so
+    wall time is the slowest query rather than the sum.
+
+    The most active user is the head of the top-talkers list (same table,
+    window and ordering), so it isn't queried separately.
+    """
+    jl, msgs, dau, top5, camps, peak = await asyncio.gather(
+        get_last_days(chat_id, window_days * 2),
+        get_messages_daily(chat_id, REPORT_SERIES_DAYS),
+        get_dau_daily(chat_id, REPORT_SERIES_DAYS),
+        get_top_talkers(chat_id, days=REPORT_TOP_DAYS, limit=5),
+        get_top_campaigns_30d(chat_id, limit=10),
+        get_peak_hour(chat_id, days=REPORT_TOP_DAYS, tz=tz),
+    )
+    return ReportBundle(
+        joins_leaves=jl,
+        messages=msgs,
+        dau=dau,
+        top_talkers=top5,
+        top_campaigns=camps,
+        peak_hour=peak,
+        top_user=top5[0] if top5 else None,
+    )
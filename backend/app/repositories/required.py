@@ -1,7 +1,40 @@
 # backend/app/repositories/required.py
 from __future__ import annotations
-from typing import List, Optional, Tuple, Dict
-from app.db import get_con
+from typing import Any, Awaitable, Callable, List, Optional, Tuple, Dict
+import asyncio
+import time
+from app.services.db import get_con
+
+# -----------------------------------------------------------------------------
+# Cache-miss coalescing: concurrent misses on the same key share one query.
+# Invalidation bumps the key's generation and forgets the in-flight load, so a
+# load that started before a write never repopulates the cache with old rows.
+# -----------------------------------------------------------------------------
+
+_inflight: Dict[Any, "asyncio.Task[Any]"] = {}
+_generation: Dict[Any, int] = {}
+
+async def _load_coalesced(key: Any, loader: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+    """
+    Run `loader` once per key for all concurrent callers.
+    Returns (value, fresh): fresh is False if the key was invalidated while
+    loading, in which case the caller should not cache the value.
+    """
+    gen = _generation.get(key, 0)
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(loader())
+        _inflight[key] = task
+        def _done(t: "asyncio.Task[Any]", k: Any = key) -> None:
+            if _inflight.get(k) is t:
+                del _inflight[k]
+        task.add_done_callback(_done)
+    value = await asyncio.shield(task)
+    return value, _generation.get(key, 0) == gen
+
+def _invalidate(key: Any) -> None:
+    _generation[key] = _generation.get(key, 0) + 1
+    _inflight.pop(key, None)
 
 # -----------------------------------------------------------------------------
 # GLOBAL required membership (used by /start gate in DM)
@@ -12,17 +45,37 @@ from app.db import get_con
 # )
 # -----------------------------------------------------------------------------
 
-async def list_required_targets() -> List[str]:
-    """
-    Return global required targets (e.g., '@MyChannel' or a t.me invite URL),
-    ordered by when they were added.
-    """
+# (fetched_at monotonic, targets); checked on every /start
+_REQUIRED_TTL = 60.0
+_required_cache: Optional[Tuple[float, List[str]]] = None
+
+async def _fetch_required_targets() -> List[str]:
     async with get_con() as con:
         rows = await con.fetch(
             "SELECT target FROM public.required_membership ORDER BY added_at ASC"
         )
     return [str(r["target"]) for r in rows]
 
+async def list_required_targets() -> List[str]:
+    """
+    Return global required targets (e.g., '@MyChannel' or a t.me invite URL),
+    ordered by when they were added.
+    Cached for _REQUIRED_TTL seconds; add/remove below invalidate.
+    """
+    global _required_cache
+    cached = _required_cache
+    if cached is not None and time.monotonic() - cached[0] < _REQUIRED_TTL:
+        return list(cached[1])
+    targets, fresh = await _load_coalesced("required", _fetch_required_targets)
+    if fresh:
+        _required_cache = (time.monotonic(), targets)
+    return list(targets)
+
+def _invalidate_required() -> None:
+    global _required_cache
+    _required_cache = None
+    _invalidate("required")
+
 async def add_required_target(target: str, added_by: Optional[int]) -> None:
     """
     Add a global required target. Idempotent.
@@ -39,6 +92,7 @@ async def add_required_target(target: str, added_by: Optional[int]) -> None:
             """,
             target, added_by
         )
+    _invalidate_required()
 
 async def remove_required_target(target: str) -> None:
     """
@@ -49,6 +103,7 @@ async def remove_required_target(target: str) -> None:
             "DELETE FROM public.required_membership WHERE target = $1",
             (target or "").strip()
         )
+    _invalidate_required()
 
 # -----------------------------------------------------------------------------
 # PER-GROUP force-join requirements (used inside groups)
@@ -62,11 +117,25 @@ async def remove_required_target(target: str) -> None:
 # )
 # -----------------------------------------------------------------------------
 
+# chat_id -> (fetched_at monotonic, targets); checked on every group message
+_GROUP_TARGETS_TTL = 60.0
+_group_targets_cache: Dict[int, Tuple[float, List[Dict[str, Optional[str]]]]] = {}
+
 async def list_group_targets(chat_id: int) -> List[Dict[str, Optional[str]]]:
     """
     Return required targets for a specific group, with optional join_url.
     [{ 'target': '@MyChannel', 'join_url': 'https://t.me/...' }, ...]
+    Cached per chat for _GROUP_TARGETS_TTL seconds; writers below invalidate.
     """
+    cached = _group_targets_cache.get(chat_id)
+    if cached is not None and time.monotonic() - cached[0] < _GROUP_TARGETS_TTL:
+        return list(cached[1])
+    targets, fresh = await _load_coalesced(("group", chat_id), lambda: _fetch_group_targets(chat_id))
+    if fresh:
+        _group_targets_cache[chat_id] = (time.monotonic(), targets)
+    return list(targets)
+
+async def _fetch_group_targets(chat_id: int) -> List[Dict[str, Optional[str]]]:
     async with get_con() as con:
         rows = await con.fetch(
             """
@@ -79,6 +148,10 @@ async def list_group_targets(chat_id: int) -> List[Dict[str, Optional[str]]]:
         )
     return [{"target": str(r["target"]), "join_url": (str(r["join_url"]) if r["join_url"] is not None else None)} for r in rows]
 
+def _invalidate_group(chat_id: int) -> None:
+    _group_targets_cache.pop(chat_id, None)
+    _invalidate(("group", chat_id))
+
 async def add_group_target(
     chat_id: int,
     target: str,
@@ -103,23 +176,30 @@ async def add_group_target(
             """,
             chat_id, target, join_url, set_by
         )
+    _invalidate_group(chat_id)
 
-async def remove_group_target(chat_id: int, target: str) -> None:
+async def _delete_group_targets(chat_id: int, target: Optional[str]) -> None:
     """
-    Delete a single required target for a group.
+    One DELETE for both paths: target=None removes every target of the group.
     """
     async with get_con() as con:
         await con.execute(
-            "DELETE FROM public.group_force_join_requirements WHERE chat_id=$1 AND target=$2",
-            chat_id, (target or "").strip()
+            """
+            DELETE FROM public.group_force_join_requirements
+            WHERE chat_id = $1 AND ($2::text IS NULL OR target = $2)
+            """,
+            chat_id, target
         )
+    _invalidate_group(chat_id)
+
+async def remove_group_target(chat_id: int, target: str) -> None:
+    """
+    Delete a single required target for a group.
+    """
+    await _delete_group_targets(chat_id, (target or "").strip())
 
 async def clear_group_targets(chat_id: int) -> None:
     """
     Clear all required targets for a group.
     """
-    async with get_con() as con:
-        await con.execute(
-            "DELETE FROM public.group_force_join_requirements WHERE chat_id=$1",
-            chat_id
-        )
+    await _delete_group_targets(chat_id, None)
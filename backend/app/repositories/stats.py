@@ -1,67 +1,363 @@
 # backend/app/repositories/stats.py
 from __future__ import annotations
-from typing import List, Tuple, Optional
-from datetime import date, datetime
+from typing import Dict, List, Tuple, Optional
+from datetime import date, datetime, timedelta, timezone
+import asyncio
+import logging
 
-from app.db import get_con
+from app.services.db import get_con
+
+log = logging.getLogger(__name__)
+
+# ---------------------------
+# SQL (hot writers)
+# ---------------------------
+# Module-level constants so every call sends byte-identical text and hits
+# asyncpg's per-connection prepared-statement cache.
+
+_SQL_UPSERT_MEMBERS_DAILY = """
+INSERT INTO chat_members_daily (chat_id, day, joins, leaves)
+VALUES ($1,$2,$3,$4)
+ON CONFLICT (chat_id, day) DO UPDATE
+  SET joins  = chat_members_daily.joins  + EXCLUDED.joins,
+      leaves = chat_members_daily.leaves + EXCLUDED.leaves
+"""
+
+_SQL_INSERT_MEMBER_EVENT = """
+INSERT INTO member_events (chat_id, tg_id, happened_at, kind)
+VALUES ($1,$2,$3,$4)
+ON CONFLICT DO NOTHING
+"""
+
+_SQL_UPSERT_CHAT_USER_INDEX = """
+INSERT INTO chat_user_index (chat_id, tg_id, first_seen_at, last_seen_at, is_member)
+VALUES ($1,$2,$3,$4,$5)
+ON CONFLICT (chat_id, tg_id) DO UPDATE SET
+  last_seen_at = excluded.last_seen_at,
+  is_member    = excluded.is_member
+"""
+
+# Message counters are merged from a per-transaction staging table that the
+# buffered counts are COPYed into (see _write_message_buffers).
+_SQL_CREATE_MSG_STAGING = """
+CREATE TEMP TABLE IF NOT EXISTS messages_by_user_staging (
+  chat_id       bigint NOT NULL,
+  date          date   NOT NULL,
+  user_id       bigint NOT NULL,
+  message_count int    NOT NULL
+) ON COMMIT DELETE ROWS
+"""
+
+_SQL_MERGE_MSG_STAGING = """
+INSERT INTO messages_by_user_daily (chat_id, date, user_id, message_count)
+SELECT chat_id, date, user_id, SUM(message_count)
+FROM messages_by_user_staging
+GROUP BY 1, 2, 3
+ON CONFLICT (chat_id, date, user_id) DO UPDATE
+  SET message_count = messages_by_user_daily.message_count + EXCLUDED.message_count
+"""
+
+_SQL_DAU_FROM_STAGING = """
+INSERT INTO dau_daily (chat_id, date, user_id)
+SELECT DISTINCT chat_id, date, user_id
+FROM messages_by_user_staging
+ON CONFLICT (chat_id, date, user_id) DO NOTHING
+"""
+
+_SQL_UPSERT_MESSAGES_DAILY = """
+INSERT INTO messages_daily (chat_id, date, message_count)
+VALUES ($1,$2,$3)
+ON CONFLICT (chat_id, date) DO UPDATE
+  SET message_count = messages_daily.message_count + EXCLUDED.message_count
+"""
+
+# ---------------------------
+# WRITE-BEHIND BUFFER (join/leave path)
+# ---------------------------
+# record_event / upsert_chat_user_index only enqueue. inc_join / inc_leave
+# just bump a per-(chat_id, day) delta in _member_deltas, so a burst of joins
+# on one chat becomes a single row update instead of N backends queueing on
+# the same row lock. One background task drains the queue every
+# _MEMBER_FLUSH_INTERVAL seconds (at most _MEMBER_FLUSH_BATCH items per
+# write), takes the deltas accumulated so far and writes each table with a
+# single executemany on one pooled connection.
+# A failed batch goes back to the head of the queue and is retried with
+# exponential backoff (up to _MEMBER_RETRY_MAX seconds). While the database is
+# unavailable the queue is capped at _MEMBER_QUEUE_MAX rows; beyond that the
+# oldest event/index rows are dropped (counter deltas are already aggregated
+# per chat and day, so they are always kept).
+# Call flush_stats_writes() on shutdown so nothing queued is lost; once it
+# has started, nothing starts a writer task again.
+
+_MEMBER_FLUSH_INTERVAL = 0.1
+_MEMBER_FLUSH_BATCH = 500
+_MEMBER_RETRY_MAX = 30.0
+_MEMBER_QUEUE_MAX = 50_000
+
+_member_queue: Optional[asyncio.Queue] = None
+_member_writer: Optional[asyncio.Task] = None
+_member_inflight: Optional[asyncio.Task] = None
+_flushing = False
+_member_dropped = 0
+
+# Not-yet-flushed state, so dedup/membership reads see queued writes.
+_pending_events: Dict[Tuple[int, int, str], datetime] = {}
+_pending_index: Dict[Tuple[int, int], bool] = {}
+
+# (chat_id, day) -> [joins, leaves] not yet written.
+_member_deltas: Dict[Tuple[int, date], List[int]] = {}
+
+
+def _enqueue_member_write(item: tuple) -> None:
+    global _member_queue, _member_writer
+    if _member_queue is None:
+        _member_queue = asyncio.Queue()
+    _member_queue.put_nowait(item)
+    _trim_member_queue()
+    if _flushing:
+        return
+    if _member_writer is None or _member_writer.done():
+        _member_writer = asyncio.get_running_loop().create_task(_member_writer_loop())
+
+
+def _add_member_delta(chat_id: int, d: date, joins: int, leaves: int) -> None:
+    acc = _member_deltas.get((chat_id, d))
+    if acc is None:
+        _member_deltas[(chat_id, d)] = [joins, leaves]
+        # Wakes the writer; whichever batch drains it also takes the deltas.
+        _enqueue_member_write(("deltas",))
+    else:
+        acc[0] += joins
+        acc[1] += leaves
+
+
+def _drain_member_queue(limit: int) -> List[tuple]:
+    batch: List[tuple] = []
+    while _member_queue is not None and len(batch) < limit:
+        try:
+            batch.append(_member_queue.get_nowait())
+        except asyncio.QueueEmpty:
+            break
+    return batch
+
+
+def _requeue_member_writes(items: List[tuple]) -> None:
+    """Put items back at the head of the queue, ahead of anything newer."""
+    global _member_queue
+    if not items:
+        return
+    if _member_queue is None:
+        _member_queue = asyncio.Queue()
+    rest = _drain_member_queue(_member_queue.qsize())
+    for item in items + rest:
+        _member_queue.put_nowait(item)
+    _trim_member_queue()
+
+
+def _forget_pending(item: tuple) -> None:
+    """Drop the pending marker of a written or dropped row, unless a newer write replaced it."""
+    if item[0] == "event":
+        _, chat_id, tg_id, happened_at, kind = item
+        if _pending_events.get((chat_id, tg_id, kind)) == happened_at:
+            _pending_events.pop((chat_id, tg_id, kind), None)
+    elif item[0] == "index":
+        _, chat_id, tg_id, is_member, _ = item
+        if _pending_index.get((chat_id, tg_id)) is is_member:
+            _pending_index.pop((chat_id, tg_id), None)
+
+
+def _trim_member_queue() -> None:
+    """Over _MEMBER_QUEUE_MAX, drop the oldest event/index rows down to 90% of it."""
+    global _member_dropped
+    if _member_queue.qsize() <= _MEMBER_QUEUE_MAX:
+        return
+    items = _drain_member_queue(_member_queue.qsize())
+    excess = len(items) - _MEMBER_QUEUE_MAX + _MEMBER_QUEUE_MAX // 10
+    dropped = 0
+    for item in items:
+        if dropped < excess and item[0] != "deltas":
+            _forget_pending(item)
+            dropped += 1
+        else:
+            _member_queue.put_nowait(item)
+    _member_dropped += dropped
+    log.warning(
+        "stats: member write queue over %d rows; dropped %d oldest (%d since start)",
+        _MEMBER_QUEUE_MAX, dropped, _member_dropped,
+    )
+
+
+async def _member_writer_loop() -> None:
+    global _member_inflight
+    failures = 0
+    while True:
+        first = await _member_queue.get()
+        if _member_queue.qsize() < _MEMBER_FLUSH_BATCH - 1:
+            try:
+                await asyncio.sleep(_MEMBER_FLUSH_INTERVAL)
+            except asyncio.CancelledError:
+                # flush_stats_writes() stopped us; leave `first` for it.
+                _requeue_member_writes([first])
+                raise
+        batch = [first] + _drain_member_queue(_MEMBER_FLUSH_BATCH - 1)
+        # Shielded so flush_stats_writes() cannot cut a batch in half.
+        _member_inflight = asyncio.ensure_future(_write_member_batch(batch))
+        try:
+            await asyncio.shield(_member_inflight)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            failures += 1
+            if failures == 1:
+                log.exception("stats: failed to write %d buffered member rows; retrying", len(batch))
+            # The batch is back at the head of the queue; back off before retrying.
+            await asyncio.sleep(min(_MEMBER_FLUSH_INTERVAL * 2 ** min(failures, 10), _MEMBER_RETRY_MAX))
+            continue
+        if failures:
+            log.info("stats: member writes recovered after %d failed attempts", failures)
+            failures = 0
+
+
+async def _write_member_batch(batch: List[tuple]) -> None:
+    global _member_deltas
+    counts, _member_deltas = _member_deltas, {}
+    rows = [item for item in batch if item[0] != "deltas"]
+    events: List[Tuple[int, int, datetime, str]] = []
+    index: Dict[Tuple[int, int], Tuple[datetime, datetime, bool]] = {}
+
+    for item in rows:
+        kind = item[0]
+        if kind == "event":
+            events.append(item[1:])
+        else:
+            _, chat_id, tg_id, is_member, ts = item
+            prev = index.get((chat_id, tg_id))
+            index[(chat_id, tg_id)] = (prev[0] if prev else ts, ts, is_member)
+
+    try:
+        if counts:
+            async with get_con() as con:
+                await con.executemany(
+                    _SQL_UPSERT_MEMBERS_DAILY,
+                    [(c, d, j, l) for (c, d), (j, l) in counts.items()]
+                )
+    except BaseException:
+        # Keep the deltas and rows for the next batch instead of dropping them.
+        for (chat_id, d), (j, l) in counts.items():
+            _add_member_delta(chat_id, d, j, l)
+        _requeue_member_writes(rows)
+        raise
+
+    try:
+        # One transaction, so a retry never inserts the same events twice.
+        async with get_con() as con:
+            async with con.transaction():
+                if events:
+                    await con.executemany(
+                        _SQL_INSERT_MEMBER_EVENT,
+                        events
+                    )
+                if index:
+                    await con.executemany(
+                        _SQL_UPSERT_CHAT_USER_INDEX,
+                        [(c, u, first, last, m) for (c, u), (first, last, m) in index.items()]
+                    )
+    except BaseException:
+        # Counters are already written; only the rows go back. Their pending
+        # markers stay set, so dedup/membership reads still see them.
+        _requeue_member_writes(rows)
+        raise
+
+    for item in rows:
+        _forget_pending(item)
+
+
+async def _stop_writer(task: Optional[asyncio.Task], inflight: Optional[asyncio.Task]) -> None:
+    if task is not None:
+        task.cancel()
+        try:
+            await task
+        except (asyncio.CancelledError, Exception):
+            pass
+    if inflight is not None and not inflight.done():
+        try:
+            await inflight
+        except Exception:
+            pass
+
+
+async def flush_stats_writes() -> None:
+    """
+    Stop the background writers and write everything still buffered.
+    The member and message buffers are flushed independently, so a failure
+    in one doesn't lose the other; failures are logged and re-raised
+    together at the end.
+    """
+    global _member_writer, _msg_writer, _flushing
+    _flushing = True
+    await _stop_writer(_member_writer, _member_inflight)
+    _member_writer = None
+    await _stop_writer(_msg_writer, _msg_inflight)
+    _msg_writer = None
+
+    failed: List[str] = []
+    try:
+        while True:
+            batch = _drain_member_queue(_MEMBER_FLUSH_BATCH)
+            if not batch:
+                break
+            await _write_member_batch(batch)
+        if _member_deltas:
+            # Deltas whose wake-up marker was taken by a batch that never wrote them.
+            await _write_member_batch([])
+    except Exception:
+        log.exception("stats: shutdown flush of member rows failed")
+        failed.append("member rows")
+
+    try:
+        await _write_message_buffers()
+    except Exception:
+        log.exception("stats: shutdown flush of message counters failed")
+        failed.append("message counters")
+
+    if failed:
+        raise RuntimeError("stats: shutdown flush failed for " + ", ".join(failed))
+
+
+def has_pending_event(chat_id: int, tg_id: int, kind: str, since: datetime) -> bool:
+    """
+    True if a member event of this kind is queued (not yet in member_events)
+    with happened_at >= since.
+    """
+    ts = _pending_events.get((chat_id, tg_id, kind))
+    return ts is not None and ts >= since
 
 # ---------------------------
 # WRITERS (Counters / Streams)
 # ---------------------------
 
 async def inc_join(chat_id: int, d: date) -> None:
-    async with get_con() as con:
-        await con.execute(
-            """
-            INSERT INTO chat_members_daily (chat_id, day, joins, leaves)
-            VALUES ($1,$2,1,0)
-            ON CONFLICT (chat_id, day) DO UPDATE
-              SET joins = chat_members_daily.joins + 1
-            """,
-            chat_id, d
-        )
+    _add_member_delta(chat_id, d, 1, 0)
 
 async def inc_leave(chat_id: int, d: date) -> None:
-    async with get_con() as con:
-        await con.execute(
-            """
-            INSERT INTO chat_members_daily (chat_id, day, joins, leaves)
-            VALUES ($1,$2,0,1)
-            ON CONFLICT (chat_id, day) DO UPDATE
-              SET leaves = chat_members_daily.leaves + 1
-            """,
-            chat_id, d
-        )
+    _add_member_delta(chat_id, d, 0, 1)
 
 async def record_event(chat_id: int, tg_id: int, happened_at: datetime, kind: str) -> None:
-    async with get_con() as con:
-        await con.execute(
-            """
-            INSERT INTO member_events (chat_id, tg_id, happened_at, kind)
-            VALUES ($1,$2,$3,$4)
-            ON CONFLICT DO NOTHING
-            """,
-            chat_id, tg_id, happened_at, kind
-        )
+    _pending_events[(chat_id, tg_id, kind)] = happened_at
+    _enqueue_member_write(("event", chat_id, tg_id, happened_at, kind))
 
 async def upsert_chat_user_index(chat_id: int, tg_id: int, is_member: bool, ts: datetime) -> None:
-    async with get_con() as con:
-        await con.execute(
-            """
-            INSERT INTO chat_user_index (chat_id, tg_id, first_seen_at, last_seen_at, is_member)
-            VALUES ($1,$2,$3,$3,$4)
-            ON CONFLICT (chat_id, tg_id) DO UPDATE SET
-              last_seen_at = excluded.last_seen_at,
-              is_member    = excluded.is_member
-            """,
-            chat_id, tg_id, ts, is_member
-        )
+    _pending_index[(chat_id, tg_id)] = is_member
+    _enqueue_member_write(("index", chat_id, tg_id, is_member, ts))
 
 async def get_is_member(chat_id: int, tg_id: int) -> Optional[bool]:
     """
     Return current membership flag for this user in this chat, if any.
     Used to deduplicate joins/leaves when multiple updates fire.
     """
+    pending = _pending_index.get((chat_id, tg_id))
+    if pending is not None:
+        return pending
     async with get_con() as con:
         row = await con.fetchrow(
             "SELECT is_member FROM chat_user_index WHERE chat_id = $1 AND tg_id = $2",
@@ -83,46 +379,89 @@ async def upsert_channel_member_count(chat_id: int, d: date, count: int) -> None
             chat_id, d, count
         )
 
+# ---------------------------
+# WRITE-BEHIND BUFFER (message counters)
+# ---------------------------
+# inc_message_count() only bumps in-memory counters. Every
+# _MSG_FLUSH_INTERVAL seconds they are swapped out and written in one
+# transaction: per-user counts are COPYed into a temp staging table and
+# merged into messages_by_user_daily / dau_daily with two INSERT ... SELECT;
+# chat totals go through one executemany. A failed flush puts the counts
+# back so the next run retries them.
+
+_MSG_FLUSH_INTERVAL = 1.0
+
+_msg_buf: Dict[Tuple[int, date, int], int] = {}
+_chat_buf: Dict[Tuple[int, date], int] = {}
+_msg_writer: Optional[asyncio.Task] = None
+_msg_inflight: Optional[asyncio.Task] = None
+
+
+async def _message_writer_loop() -> None:
+    global _msg_inflight
+    while True:
+        await asyncio.sleep(_MSG_FLUSH_INTERVAL)
+        if not _chat_buf and not _msg_buf:
+            continue
+        _msg_inflight = asyncio.ensure_future(_write_message_buffers())
+        try:
+            await asyncio.shield(_msg_inflight)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            log.exception("stats: failed to flush message counters")
+
+
+async def _write_message_buffers() -> None:
+    global _msg_buf, _chat_buf
+    per_user, per_chat = _msg_buf, _chat_buf
+    if not per_user and not per_chat:
+        return
+    _msg_buf, _chat_buf = {}, {}
+
+    try:
+        async with get_con() as con:
+            async with con.transaction():
+                if per_user:
+                    await con.execute(_SQL_CREATE_MSG_STAGING)
+                    await con.copy_records_to_table(
+                        "messages_by_user_staging",
+                        records=[(c, d, u, n) for (c, d, u), n in per_user.items()],
+                        columns=["chat_id", "date", "user_id", "message_count"],
+                    )
+                    await con.execute(_SQL_MERGE_MSG_STAGING)
+                    await con.execute(_SQL_DAU_FROM_STAGING)
+                if per_chat:
+                    await con.executemany(
+                        _SQL_UPSERT_MESSAGES_DAILY,
+                        [(c, d, n) for (c, d), n in per_chat.items()]
+                    )
+    except BaseException:
+        for key, n in per_user.items():
+            _msg_buf[key] = _msg_buf.get(key, 0) + n
+        for key, n in per_chat.items():
+            _chat_buf[key] = _chat_buf.get(key, 0) + n
+        raise
+
+
 async def inc_message_count(chat_id: int, d: date, user_id: int | None = None, count: int = 1) -> None:
     """
-    Increments:
+    Buffers an increment of:
       - messages_daily (chat total)
       - messages_by_user_daily (per user) if user_id provided
       - dau_daily (unique user per day) if user_id provided
+    Written by the background flusher (see above).
     """
-    async with get_con() as con:
-        # chat total per day
-        await con.execute(
-            """
-            INSERT INTO messages_daily (chat_id, date, message_count)
-            VALUES ($1,$2,$3)
-            ON CONFLICT (chat_id, date) DO UPDATE
-              SET message_count = messages_daily.message_count + $3
-            """,
-            chat_id, d, count
-        )
-        if user_id is not None:
-            # per user per day
-            await con.execute(
-                """
-                INSERT INTO messages_by_user_daily (chat_id, date, user_id, message_count)
-                VALUES ($1,$2,$3,$4)
-                ON CONFLICT (chat_id, date, user_id) DO UPDATE
-                  SET message_count = messages_by_user_daily.message_count + $4
-                """,
-                chat_id, d, user_id, count
-            )
-            # DAU (avoid duplicate row)
-            await con.execute(
-                """
-                INSERT INTO dau_daily (chat_id, date, user_id)
-                SELECT $1, $2, $3
-                WHERE NOT EXISTS (
-                  SELECT 1 FROM dau_daily WHERE chat_id=$1 AND date=$2 AND user_id=$3
-                )
-                """,
-                chat_id, d, user_id
-            )
+    global _msg_writer
+    key = (chat_id, d)
+    _chat_buf[key] = _chat_buf.get(key, 0) + count
+    if user_id is not None:
+        ukey = (chat_id, d, user_id)
+        _msg_buf[ukey] = _msg_buf.get(ukey, 0) + count
+    if _flushing:
+        return
+    if _msg_writer is None or _msg_writer.done():
+        _msg_writer = asyncio.get_running_loop().create_task(_message_writer_loop())
 
 # ---------------------------
 # READERS (Joins/Leaves series)
@@ -132,23 +471,29 @@ async def get_last_days(chat_id: int, days: int = 30) -> List[Tuple[str, int, in
     """
     Window of last `days` for joins/leaves (DESC), zero-filled for missing days.
     Output: [(YYYY-MM-DD, joins, leaves), ...]
+
+    Only stored rows are fetched (index range scan on (chat_id, day)); the
+    zero-fill happens here instead of a generate_series join. Days are UTC,
+    matching the writers.
     """
+    today = datetime.now(timezone.utc).date()
+    start = today - timedelta(days=days - 1)
     async with get_con() as con:
         rows = await con.fetch(
             """
-            WITH days AS (
-              SELECT d::date AS day
-              FROM generate_series(current_date - ($2::int - 1), current_date, interval '1 day') AS d
-            )
-            SELECT to_char(days.day, 'YYYY-MM-DD') AS d,
-                   COALESCE(cmd.joins, 0)  AS joins,
-                   COALESCE(cmd.leaves, 0) AS leaves
-            FROM days
-            LEFT JOIN chat_members_daily cmd
-              ON cmd.chat_id = $1
-             AND cmd.day     = days.day
-            ORDER BY days.day DESC
+            SELECT day, joins, leaves
+            FROM chat_members_daily
+            WHERE chat_id = $1
+              AND day >= $2
+            ORDER BY day DESC
             """,
-            chat_id, days
+            chat_id, start
         )
-    return [(r["d"], int(r["joins"]), int(r["leaves"])) for r in rows]
+    # `day` arrives as 'YYYY-MM-DD' (date codec in app.services.db)
+    by_day = {r["day"]: (r["joins"], r["leaves"]) for r in rows}
+    out: List[Tuple[str, int, int]] = []
+    for i in range(days):
+        d = (today - timedelta(days=i)).isoformat()
+        j, l = by_day.get(d, (0, 0))
+        out.append((d, j, l))
+    return out
@@ -1,18 +1,39 @@
 # backend/app/repositories/subscriptions.py
 from __future__ import annotations
 
-from typing import Optional
-from datetime import datetime, timezone, timedelta
+import asyncio
+import logging
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timezone
 
-from app.db import get_con
+from app.services.db import get_con
 from app.services.owners import is_owner
 
 UTC = timezone.utc
 
+log = logging.getLogger(__name__)
+
+# tg_id -> (monotonic deadline, is_pro). Status is read on nearly every
+# command, so keep it briefly; a Pro entry never outlives its expires_at.
+# The size bound evicts oldest first.
+_STATUS_TTL = 60.0
+_STATUS_CACHE_MAX = 100_000
+_status_cache: Dict[int, Tuple[float, bool]] = {}
+
+
+def _status_cache_put(tg_id: int, deadline: float, is_pro: bool) -> None:
+    _status_cache.pop(tg_id, None)
+    if len(_status_cache) >= _STATUS_CACHE_MAX:
+        del _status_cache[next(iter(_status_cache))]
+    _status_cache[tg_id] = (deadline, is_pro)
+
 __all__ = [
     "get_user_subscription_expiry",
     "get_user_subscription_status",
     "upsert_subscription_on_payment",
+    "flush_payment_audit",
     # legacy alias
     "get_user_subscription",
 ]
@@ -20,14 +41,13 @@ __all__ = [
 
 async def get_user_subscription_expiry(tg_id: int) -> Optional[datetime]:
     """
-    Return the latest expires_at for a user, or None.
+    Return expires_at for a user, or None (tg_id is the primary key).
     """
     async with get_con() as con:
-        r = await con.fetchrow(
-            "SELECT MAX(expires_at) AS exp FROM public.subscriptions WHERE tg_id=$1",
+        return await con.fetchval(
+            "SELECT expires_at FROM public.subscriptions WHERE tg_id=$1",
             tg_id,
         )
-    return r["exp"] if r and r["exp"] else None
 
 
 async def get_user_subscription_status(tg_id: int) -> str:
@@ -38,10 +58,21 @@ async def get_user_subscription_status(tg_id: int) -> str:
     if is_owner(tg_id):
         return "Pro"
 
-    exp = await get_user_subscription_expiry(tg_id)
-    if exp and exp > datetime.now(UTC):
-        return "Pro"
-    return "Free"
+    mono = time.monotonic()
+    cached = _status_cache.get(tg_id)
+    if cached and cached[0] > mono:
+        return "Pro" if cached[1] else "Free"
+
+    async with get_con() as con:
+        exp = await con.fetchval(
+            "SELECT expires_at FROM public.subscriptions WHERE tg_id=$1 AND expires_at > now()",
+            tg_id,
+        )
+    now = datetime.now(UTC)
+    is_pro = bool(exp and exp > now)
+    ttl = min(_STATUS_TTL, (exp - now).total_seconds()) if is_pro else _STATUS_TTL
+    _status_cache_put(tg_id, mono + ttl, is_pro)
+    return "Pro" if is_pro else "Free"
 
 
 async def upsert_subscription_on_payment(
@@ -51,69 +82,172 @@ async def upsert_subscription_on_payment(
     amount_stars: int,
     provider_payment_charge_id: Optional[str],
     telegram_payment_charge_id: Optional[str],
-) -> None:
+) -> Optional[datetime]:
     """
-    Extend or start a subscription:
-      base = greatest(existing_expires_at, now)
-      new_expires_at = base + duration_days
-    Also attempts to write an audit row into payments (best-effort).
+    Extend or start a subscription in one statement:
+      new_expires_at = greatest(existing_expires_at, now) + duration_days
+    Also queues an audit row for payments (best-effort, written async).
+    Returns the new expires_at.
     """
     now = datetime.now(UTC)
 
     async with get_con() as con:
-        base = await con.fetchval(
-            "SELECT GREATEST(MAX(expires_at), $1) FROM public.subscriptions WHERE tg_id=$2",
-            now,
-            tg_id,
-        )
-        if not base:
-            base = now
-        new_expires = base + timedelta(days=int(duration_days))
-
         # Single-row upsert by tg_id (your schema has tg_id as PRIMARY KEY)
-        await con.execute(
+        new_expires = await con.fetchval(
             """
             INSERT INTO public.subscriptions (tg_id, plan, started_at, expires_at)
-            VALUES ($1, $2, $3, $4)
+            VALUES ($1, $2, $3, $3 + make_interval(days => $4::int))
             ON CONFLICT (tg_id) DO UPDATE
               SET plan       = EXCLUDED.plan,
                   started_at = EXCLUDED.started_at,
-                  expires_at = EXCLUDED.expires_at
+                  expires_at = GREATEST(subscriptions.expires_at, EXCLUDED.started_at)
+                               + make_interval(days => $4::int)
+            RETURNING expires_at
             """,
             tg_id,
             plan_code,
             now,
-            new_expires,
+            int(duration_days),
         )
+        _status_cache.pop(tg_id, None)
+
+    # Optional audit: queued, written by the background writer below
+    _enqueue_payment_audit((
+        uuid.uuid4(),
+        tg_id,
+        amount_stars,
+        plan_code,
+        provider_payment_charge_id,
+        telegram_payment_charge_id,
+        now,
+    ))
+
+    return new_expires
+
+
+# --------- Payments audit (write-behind) ---------
+# The audit row is not needed to answer the user, so it never sits on the
+# payment path: rows are queued and written every _AUDIT_FLUSH_INTERVAL
+# seconds with one executemany. ids are generated here, so a retried batch
+# is idempotent (ON CONFLICT (id) DO NOTHING). A failed batch goes back to the
+# head of the queue and is retried with the next one.
 
-        # Optional audit (do not block on failure)
+_AUDIT_FLUSH_INTERVAL = 0.5
+_AUDIT_FLUSH_BATCH = 500
+
+_SQL_INSERT_PAYMENT_AUDIT = """
+INSERT INTO public.payments (
+  id, tenant_id, tg_user_id, amount, currency, method,
+  provider_payload, status, created_at
+)
+VALUES (
+  $1, NULL, $2, $3, 'XTR', 'stars',
+  jsonb_build_object(
+    'plan', $4::text,
+    'provider_payment_charge_id', $5::text,
+    'telegram_payment_charge_id', $6::text
+  ),
+  'paid', $7
+)
+ON CONFLICT (id) DO NOTHING
+"""
+
+_audit_queue: Optional[asyncio.Queue] = None
+_audit_writer: Optional[asyncio.Task] = None
+_audit_inflight: Optional[asyncio.Task] = None
+
+
+def _enqueue_payment_audit(row: tuple) -> None:
+    global _audit_queue, _audit_writer
+    if _audit_queue is None:
+        _audit_queue = asyncio.Queue()
+    _audit_queue.put_nowait(row)
+    if _audit_writer is None or _audit_writer.done():
+        _audit_writer = asyncio.get_running_loop().create_task(_audit_writer_loop())
+
+
+def _drain_audit_queue() -> List[tuple]:
+    rows: List[tuple] = []
+    while _audit_queue is not None and len(rows) < _AUDIT_FLUSH_BATCH:
+        try:
+            rows.append(_audit_queue.get_nowait())
+        except asyncio.QueueEmpty:
+            break
+    return rows
+
+
+def _requeue_payment_audit(rows: List[tuple]) -> None:
+    """Put rows back at the head of the queue, ahead of anything newer."""
+    global _audit_queue
+    if _audit_queue is None:
+        _audit_queue = asyncio.Queue()
+    rest: List[tuple] = []
+    while not _audit_queue.empty():
+        rest.append(_audit_queue.get_nowait())
+    for row in rows + rest:
+        _audit_queue.put_nowait(row)
+
+
+async def _write_payment_audit(rows: List[tuple]) -> bool:
+    """Write one batch; on failure requeue it and return False."""
+    try:
+        async with get_con() as con:
+            await con.executemany(_SQL_INSERT_PAYMENT_AUDIT, rows)
+    except BaseException as e:
+        _requeue_payment_audit(rows)
+        if not isinstance(e, Exception):
+            raise
+        log.exception("payments audit: failed to write %d rows, will retry", len(rows))
+        return False
+    return True
+
+
+async def _audit_writer_loop() -> None:
+    global _audit_inflight
+    while True:
+        first = await _audit_queue.get()
         try:
-            await con.execute(
-                """
-                INSERT INTO public.payments (
-                  id, tenant_id, tg_user_id, amount, currency, method,
-                  provider_payload, status, created_at
-                )
-                VALUES (
-                  gen_random_uuid(), NULL, $1, $2, 'XTR', 'stars',
-                  jsonb_build_object(
-                    'plan', $3,
-                    'provider_payment_charge_id', $4,
-                    'telegram_payment_charge_id', $5
-                  ),
-                  'paid', $6
-                )
-                """,
-                tg_id,
-                amount_stars,
-                plan_code,
-                provider_payment_charge_id,
-                telegram_payment_charge_id,
-                now,
-            )
-        except Exception:
-            # best-effort logging could be added here
-            pass
+            await asyncio.sleep(_AUDIT_FLUSH_INTERVAL)
+        except asyncio.CancelledError:
+            # flush_payment_audit() stopped us; leave `first` for it.
+            _requeue_payment_audit([first])
+            raise
+        rows = [first] + _drain_audit_queue()
+        # Shielded so flush_payment_audit() cannot cut a batch in half.
+        _audit_inflight = asyncio.ensure_future(_write_payment_audit(rows))
+        await asyncio.shield(_audit_inflight)
+
+
+async def flush_payment_audit(timeout: float = 5.0) -> None:
+    """
+    Stop the audit writer and write whatever is still queued, giving up
+    after `timeout` seconds.
+    """
+    async def _drain_all() -> None:
+        global _audit_writer
+        if _audit_writer is not None:
+            _audit_writer.cancel()
+            try:
+                await _audit_writer
+            except (asyncio.CancelledError, Exception):
+                pass
+            _audit_writer = None
+        if _audit_inflight is not None and not _audit_inflight.done():
+            # A failed in-flight batch requeues itself before this returns.
+            await _audit_inflight
+        while True:
+            rows = _drain_audit_queue()
+            if not rows:
+                return
+            if not await _write_payment_audit(rows):
+                return
+
+    try:
+        await asyncio.wait_for(_drain_all(), timeout)
+    except asyncio.TimeoutError:
+        log.warning("payments audit: shutdown flush timed out after %.1fs", timeout)
+    if _audit_queue is not None and not _audit_queue.empty():
+        log.error("payments audit: %d rows not written at shutdown", _audit_queue.qsize())
 
 
 # --------- Legacy compatibility (optional) ---------
@@ -1,7 +1,32 @@
 # backend/app/repositories/tenants.py
 from __future__ import annotations
-from typing import Optional, List, Dict, Any
-import app.db as app_db
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Optional, List, Dict, Any, Tuple
+import app.services.db as app_db
+from app.services.db import get_prepared, register_prepared
+
+# One round trip for hit and miss. The conflict arm is DO NOTHING (not a
+# no-op DO UPDATE) so the common "already exists" case writes nothing.
+register_prepared("tenants.ensure_personal", """
+    with ins as (
+      insert into public.tenants (owner_tg_id, name) values ($1, $2)
+      on conflict (owner_tg_id) do nothing
+      returning id
+    )
+    select id from ins
+    union all
+    select id from public.tenants where owner_tg_id = $1
+    limit 1
+""")
+register_prepared("tenants.user_tenant", "select tenant_id from public.user_tenants where tg_id = $1")
+
+# tg_id -> (fetched_at monotonic, tenant_id); read on most updates.
+# link_user_to_tenant drops the key; the size bound evicts oldest first.
+_USER_TENANT_TTL = 300.0
+_USER_TENANT_MAX = 100_000
+_user_tenant_cache: Dict[int, Tuple[float, Optional[str]]] = {}
 
 # -----------------------------------------------------------------------------
 # Tenants & user↔tenant linkage
@@ -13,193 +38,201 @@ async def ensure_personal_tenant(owner_tg_id: int, name: str) -> str:
     Schema: public.tenants(id uuid PK default gen_random_uuid(), owner_tg_id bigint not null, name text not null, created_at timestamptz default now()).
     """
     async with app_db.get_con() as con:
-        row = await con.fetchrow(
-            "select id from public.tenants where owner_tg_id = $1",
-            owner_tg_id,
-        )
-        if row:
-            return str(row["id"])
-        row = await con.fetchrow(
-            "insert into public.tenants (owner_tg_id, name) values ($1,$2) returning id",
-            owner_tg_id, name or f"Tenant {owner_tg_id}",
-        )
-        return str(row["id"])
+        stmt = await get_prepared(con, "tenants.ensure_personal")
+        row = await stmt.fetchrow(owner_tg_id, name or f"Tenant {owner_tg_id}")
+        if row is None:
+            # A concurrent insert won the conflict after our snapshot was
+            # taken; a fresh statement sees the committed row.
+            row = await con.fetchrow(
+                "select id from public.tenants where owner_tg_id = $1", owner_tg_id
+            )
+    return str(row["id"])
 
 async def link_user_to_tenant(tg_id: int, tenant_id: str) -> None:
     """
     Upsert mapping in public.user_tenants(tg_id bigint, tenant_id uuid).
     """
-    async with app_db.get_con() as con:
-        await con.execute(
-            """
-            insert into public.user_tenants (tg_id, tenant_id)
-            values ($1,$2)
-            on conflict (tg_id) do update set tenant_id = excluded.tenant_id
-            """,
-            tg_id, tenant_id,
-        )
+    await app_db.pool_sync().execute(
+        """
+        insert into public.user_tenants (tg_id, tenant_id)
+        values ($1,$2)
+        on conflict (tg_id) do update set tenant_id = excluded.tenant_id
+        """,
+        tg_id, tenant_id,
+    )
+    _user_tenant_cache.pop(tg_id, None)
 
 async def get_user_tenant(tg_id: int) -> Optional[str]:
     """
     Return tenant_id (str) for a given user, if any.
     """
+    hit = _user_tenant_cache.get(tg_id)
+    if hit is not None and time.monotonic() - hit[0] < _USER_TENANT_TTL:
+        return hit[1]
     async with app_db.get_con() as con:
-        row = await con.fetchrow(
-            "select tenant_id from public.user_tenants where tg_id = $1",
-            tg_id,
-        )
-    return str(row["tenant_id"]) if row and row["tenant_id"] is not None else None
+        row = await (await get_prepared(con, "tenants.user_tenant")).fetchrow(tg_id)
+    tenant_id = str(row["tenant_id"]) if row and row["tenant_id"] is not None else None
+    _user_tenant_cache.pop(tg_id, None)
+    if len(_user_tenant_cache) >= _USER_TENANT_MAX:
+        del _user_tenant_cache[next(iter(_user_tenant_cache))]
+    _user_tenant_cache[tg_id] = (time.monotonic(), tenant_id)
+    return tenant_id
 
 async def get_tenant(tenant_id: str) -> Optional[Dict[str, Any]]:
     """
     Fetch tenant basic info.
     """
-    async with app_db.get_con() as con:
-        r = await con.fetchrow(
-            "select id, name, owner_tg_id, created_at from public.tenants where id = $1",
-            tenant_id,
-        )
+    r = await app_db.pool_sync().fetchrow(
+        "select id, name, owner_tg_id, to_char(created_at, 'YYYY-MM-DD') as created_at from public.tenants where id = $1",
+        tenant_id,
+    )
     if not r:
         return None
     return {
         "id": str(r["id"]),
         "name": r["name"],
         "owner_tg_id": int(r["owner_tg_id"]) if r["owner_tg_id"] is not None else None,
-        "created_at": r["created_at"].strftime("%Y-%m-%d"),
+        "created_at": r["created_at"],
     }
 
 async def count_active_tenants() -> int:
     """
     Count active tenants (your schema has a view/table public.active_tenants(tenant_id uuid)).
+    Read live: the view is the source of truth for "active", so this must
+    not lag behind tenant_stats.
     """
-    async with app_db.get_con() as con:
-        row = await con.fetchrow("select count(*) as c from public.active_tenants")
-    return int(row["c"]) if row else 0
+    row = await app_db.pool_sync().fetchrow("select count(*)::int as c from public.active_tenants")
+    return row["c"] if row else 0
 
 # -----------------------------------------------------------------------------
 # Tenant listings with stats
 # -----------------------------------------------------------------------------
 
-async def list_tenants_page_with_stats(limit: int, offset: int) -> List[Dict[str, Any]]:
+async def refresh_tenant_stats() -> None:
     """
-    Paginated tenants with:
-      - chat_count from public.chats
-      - latest plan across any user linked to the tenant from public.subscriptions
-        (not expiry-filtered; mirrors your current logic)
+    Recompute public.tenant_stats (chat_count, latest plan per tenant).
+    CONCURRENTLY keeps the listings readable while it runs.
     """
-    async with app_db.get_con() as con:
-        rows = await con.fetch(
-            """
-            with latest_plan as (
-              select ut.tenant_id, s.plan,
-                     row_number() over (partition by ut.tenant_id order by s.started_at desc) as rn
-              from public.user_tenants ut
-              join public.subscriptions s on s.tg_id = ut.tg_id
-            ),
-            chat_counts as (
-              select tenant_id, count(*) as chat_count
-              from public.chats
-              group by tenant_id
-            )
-            select t.id, t.name, t.owner_tg_id, t.created_at,
-                   coalesce(cc.chat_count, 0) as chat_count,
-                   lower(coalesce(lp.plan, 'inactive')) as plan
-            from public.tenants t
-            left join chat_counts cc on cc.tenant_id = t.id
-            left join latest_plan lp on lp.tenant_id = t.id and lp.rn = 1
-            order by t.created_at desc
-            limit $1 offset $2
-            """,
-            limit, offset,
-        )
+    await app_db.pool_sync().execute("refresh materialized view concurrently public.tenant_stats")
+
+@dataclass(slots=True)
+class TenantRow:
+    """One row of the admin tenant list/search/export."""
+    id: str
+    name: str
+    owner_tg_id: Optional[int]
+    created_at: str          # YYYY-MM-DD
+    chat_count: int
+    plan: str
+
+def _tenant_rows(rows) -> List[TenantRow]:
+    # Column order is fixed by _TENANT_PAGE_SELECT; index access skips the
+    # per-field name lookup on Record.
     return [
-        {
-            "id": str(r["id"]),
-            "name": r["name"],
-            "owner_tg_id": int(r["owner_tg_id"]) if r["owner_tg_id"] is not None else None,
-            "created_at": r["created_at"].strftime("%Y-%m-%d"),
-            "chat_count": int(r["chat_count"]),
-            "plan": str(r["plan"]),
-        } for r in rows
+        TenantRow(str(r[0]), r[1], r[2], r[3], r[4], r[5])
+        for r in rows
     ]
 
-async def search_tenants_page_with_stats(q: str, limit: int, offset: int) -> List[Dict[str, Any]]:
-    """
-    Search by name, owner_tg_id, or id (uuid::text), with same stats as above.
-    """
-    async with app_db.get_con() as con:
-        rows = await con.fetch(
-            """
-            with latest_plan as (
-              select ut.tenant_id, s.plan,
-                     row_number() over (partition by ut.tenant_id order by s.started_at desc) as rn
-              from public.user_tenants ut
-              left join public.subscriptions s on s.tg_id = ut.tg_id
-            ),
-            chat_counts as (
-              select tenant_id, count(*) as chat_count
-              from public.chats
-              group by tenant_id
-            )
-            select t.id, t.name, t.owner_tg_id, t.created_at,
-                   coalesce(cc.chat_count, 0) as chat_count,
-                   lower(coalesce(lp.plan, 'inactive')) as plan
+_TENANT_PAGE_SELECT = """
+            select t.id, t.name, t.owner_tg_id,
+                   to_char(t.created_at, 'YYYY-MM-DD') as created_at,
+                   coalesce(ts.chat_count, 0) as chat_count,
+                   coalesce(ts.plan, 'inactive') as plan
             from public.tenants t
-            left join chat_counts cc on cc.tenant_id = t.id
-            left join latest_plan lp on lp.tenant_id = t.id and lp.rn = 1
+            left join public.tenant_stats ts on ts.tenant_id = t.id
+"""
+
+# Keyset pages over (created_at desc, id desc). The cursor is a tenant id;
+# its (created_at, id) is looked up inline so callers only carry the uuid.
+_SQL_TENANTS_FIRST = _TENANT_PAGE_SELECT + """
+            order by t.created_at desc, t.id desc
+            limit $1
+"""
+_SQL_TENANTS_AFTER = _TENANT_PAGE_SELECT + """
+            where (t.created_at, t.id) < (select created_at, id from public.tenants where id = $2::uuid)
+            order by t.created_at desc, t.id desc
+            limit $1
+"""
+_SQL_TENANTS_BEFORE = _TENANT_PAGE_SELECT + """
+            where (t.created_at, t.id) > (select created_at, id from public.tenants where id = $2::uuid)
+            order by t.created_at asc, t.id asc
+            limit $1
+"""
+
+async def list_tenants_page_with_stats(
+    limit: int,
+    after_id: Optional[str] = None,
+    before_id: Optional[str] = None,
+) -> List[TenantRow]:
+    """
+    Paginated tenants (newest first) with:
+      - chat_count from public.chats
+      - latest plan across any user linked to the tenant from public.subscriptions
+        (not expiry-filtered; mirrors your current logic)
+    Both come from the public.tenant_stats materialized view, so they can lag
+    by up to one refresh (see refresh_tenant_stats).
+
+    Keyset pagination: pass the last row's id as `after_id` for the next page,
+    or the first row's id as `before_id` for the previous one. Either way rows
+    come back newest first.
+    """
+    if after_id:
+        rows = await app_db.pool_sync().fetch(_SQL_TENANTS_AFTER, limit, after_id)
+    elif before_id:
+        rows = await app_db.pool_sync().fetch(_SQL_TENANTS_BEFORE, limit, before_id)
+        rows = rows[::-1]
+    else:
+        rows = await app_db.pool_sync().fetch(_SQL_TENANTS_FIRST, limit)
+    return _tenant_rows(rows)
+
+_SQL_SEARCH_BY_ID = _TENANT_PAGE_SELECT + """
+            where t.id = $1::uuid
+            limit $2 offset $3
+"""
+_SQL_SEARCH_BY_OWNER = _TENANT_PAGE_SELECT + """
+            where t.owner_tg_id = $1::bigint
+               or t.name ilike '%'||$4||'%'
+            order by t.created_at desc
+            limit $2 offset $3
+"""
+_SQL_SEARCH_TEXT = _TENANT_PAGE_SELECT + """
             where (t.name ilike '%'||$1||'%'
                or cast(t.owner_tg_id as text) ilike '%'||$1||'%'
                or cast(t.id as text) ilike '%'||$1||'%')
             order by t.created_at desc
             limit $2 offset $3
-            """,
-            q, limit, offset,
-        )
-    return [
-        {
-            "id": str(r["id"]),
-            "name": r["name"],
-            "owner_tg_id": int(r["owner_tg_id"]) if r["owner_tg_id"] is not None else None,
-            "created_at": r["created_at"].strftime("%Y-%m-%d"),
-            "chat_count": int(r["chat_count"]),
-            "plan": str(r["plan"]),
-        } for r in rows
-    ]
+"""
+
+_SQL_TENANTS_EXPORT = _TENANT_PAGE_SELECT + """
+            order by t.created_at desc
+"""
 
-async def export_all_tenants_with_stats() -> List[Dict[str, Any]]:
+_BIGINT_MAX = 2**63 - 1
+
+async def search_tenants_page_with_stats(q: str, limit: int, offset: int) -> List[TenantRow]:
+    """
+    Search by name, owner_tg_id, or id (uuid::text), with same stats as above.
+    A query that is a whole UUID or a whole tg_id is answered by equality
+    (PK / owner_tg_id) instead of the substring match.
+    """
+    q = (q or "").strip()
+    tenant_uuid: Optional[uuid.UUID] = None
+    try:
+        tenant_uuid = uuid.UUID(q)
+    except ValueError:
+        pass
+
+    if tenant_uuid is not None:
+        rows = await app_db.pool_sync().fetch(_SQL_SEARCH_BY_ID, tenant_uuid, limit, offset)
+    elif q.isascii() and q.isdigit() and int(q) <= _BIGINT_MAX:
+        rows = await app_db.pool_sync().fetch(_SQL_SEARCH_BY_OWNER, int(q), limit, offset, q)
+    else:
+        rows = await app_db.pool_sync().fetch(_SQL_SEARCH_TEXT, q, limit, offset)
+    return _tenant_rows(rows)
+
+async def export_all_tenants_with_stats() -> List[TenantRow]:
     """
     Full export with same columns as list/search, ordered by created_at desc.
     """
-    async with app_db.get_con() as con:
-        rows = await con.fetch(
-            """
-            with latest_plan as (
-              select ut.tenant_id, s.plan,
-                     row_number() over (partition by ut.tenant_id order by s.started_at desc) as rn
-              from public.user_tenants ut
-              left join public.subscriptions s on s.tg_id = ut.tg_id
-            ),
-            chat_counts as (
-              select tenant_id, count(*) as chat_count
-              from public.chats
-              group by tenant_id
-            )
-            select t.id, t.name, t.owner_tg_id, t.created_at,
-                   coalesce(cc.chat_count, 0) as chat_count,
-                   lower(coalesce(lp.plan, 'inactive')) as plan
-            from public.tenants t
-            left join chat_counts cc on cc.tenant_id = t.id
-            left join latest_plan lp on lp.tenant_id = t.id and lp.rn = 1
-            order by t.created_at desc
-            """
-        )
-    return [
-        {
-            "id": str(r["id"]),
-            "name": r["name"],
-            "owner_tg_id": int(r["owner_tg_id"]) if r["owner_tg_id"] is not None else None,
-            "created_at": r["created_at"].strftime("%Y-%m-%d"),
-            "chat_count": int(r["chat_count"]),
-            "plan": str(r["plan"]),
-        } for r in rows
-    ]
+    rows = await app_db.pool_sync().fetch(_SQL_TENANTS_EXPORT)
+    return _tenant_rows(rows)
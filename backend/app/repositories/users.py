@@ -1,6 +1,30 @@
 from __future__ import annotations
-from typing import Optional, List
-from app.db import get_con
+import time
+from typing import Any, AsyncIterator, Dict, Optional, List, Tuple
+from app.services.db import get_con, get_prepared, pool_sync, register_prepared
+
+register_prepared("users.has_phone", "SELECT phone_e164 FROM public.users WHERE tg_id = $1")
+register_prepared("users.get_language", "SELECT language FROM public.users WHERE tg_id = $1")
+
+# tg_id -> (fetched_at monotonic, value) for has_phone / get_language, which
+# run on almost every update. Writers below drop the key; the size bound
+# evicts the oldest entries first.
+_USER_CACHE_TTL = 300.0
+_USER_CACHE_MAX = 100_000
+_phone_cache: Dict[int, Tuple[float, bool]] = {}
+_language_cache: Dict[int, Tuple[float, Optional[str]]] = {}
+
+def _cache_get(cache: Dict[int, Tuple[float, Any]], tg_id: int) -> Optional[Tuple[float, Any]]:
+    hit = cache.get(tg_id)
+    if hit is not None and time.monotonic() - hit[0] < _USER_CACHE_TTL:
+        return hit
+    return None
+
+def _cache_put(cache: Dict[int, Tuple[float, Any]], tg_id: int, value: Any) -> None:
+    cache.pop(tg_id, None)
+    if len(cache) >= _USER_CACHE_MAX:
+        del cache[next(iter(cache))]
+    cache[tg_id] = (time.monotonic(), value)
 
 async def upsert_user(
     tg_id: int,
@@ -12,74 +36,102 @@ async def upsert_user(
     region: Optional[str],
     is_premium: bool,
 ) -> None:
-    async with get_con() as con:
-        await con.execute(
-            """
-            INSERT INTO public.users
-                (tg_id, first_name, last_name, username, language_code,
-                 phone_e164, region, is_premium, created_at, updated_at, last_seen_at)
-            VALUES
-                ($1, $2, $3, $4, $5, $6, $7, $8, now(), now(), now())
-            ON CONFLICT (tg_id) DO UPDATE SET
-                first_name    = EXCLUDED.first_name,
-                last_name     = EXCLUDED.last_name,
-                username      = EXCLUDED.username,
-                language_code = EXCLUDED.language_code,
-                phone_e164    = COALESCE(EXCLUDED.phone_e164, public.users.phone_e164),
-                region        = COALESCE(EXCLUDED.region, public.users.region),
-                is_premium    = EXCLUDED.is_premium,
-                updated_at    = now(),
-                last_seen_at  = now()
-            """,
-            tg_id, first_name, last_name, username, language_code,
-            phone_e164, region, is_premium
-        )
+    await pool_sync().execute(
+        """
+        INSERT INTO public.users
+            (tg_id, first_name, last_name, username, language_code,
+             phone_e164, region, is_premium, created_at, updated_at, last_seen_at)
+        VALUES
+            ($1, $2, $3, $4, $5, $6, $7, $8, now(), now(), now())
+        ON CONFLICT (tg_id) DO UPDATE SET
+            first_name    = EXCLUDED.first_name,
+            last_name     = EXCLUDED.last_name,
+            username      = EXCLUDED.username,
+            language_code = EXCLUDED.language_code,
+            phone_e164    = COALESCE(EXCLUDED.phone_e164, public.users.phone_e164),
+            region        = COALESCE(EXCLUDED.region, public.users.region),
+            is_premium    = EXCLUDED.is_premium,
+            updated_at    = now(),
+            last_seen_at  = now()
+        """,
+        tg_id, first_name, last_name, username, language_code,
+        phone_e164, region, is_premium
+    )
+    _phone_cache.pop(tg_id, None)
 
 async def has_phone(tg_id: int) -> bool:
+    hit = _cache_get(_phone_cache, tg_id)
+    if hit is not None:
+        return hit[1]
     async with get_con() as con:
-        row = await con.fetchrow(
-            "SELECT phone_e164 FROM public.users WHERE tg_id = $1",
-            tg_id
-        )
-    return bool(row and row["phone_e164"])
+        row = await (await get_prepared(con, "users.has_phone")).fetchrow(tg_id)
+    result = bool(row and row["phone_e164"])
+    _cache_put(_phone_cache, tg_id, result)
+    return result
 
 # --- New: admin/broadcast helpers ---
 
-async def count_all_users() -> int:
-    async with get_con() as con:
-        row = await con.fetchrow("select count(*) as c from public.users")
-    return int(row["c"]) if row else 0
+async def count_users() -> Tuple[int, int]:
+    """
+    (total, premium) in one scan.
+    """
+    row = await pool_sync().fetchrow(
+        "select count(*)::int as total, count(*) filter (where is_premium)::int as premium from public.users"
+    )
+    return (row["total"], row["premium"]) if row else (0, 0)
 
-async def count_premium_users() -> int:
+async def iter_all_user_ids(batch: int = 1000) -> AsyncIterator[int]:
+    """
+    Stream every tg_id through a server-side cursor, `batch` rows per fetch.
+    Holds one connection (and a read transaction) until the iteration ends,
+    so consume it promptly.
+    """
     async with get_con() as con:
-        row = await con.fetchrow("select count(*) as c from public.users where is_premium = true")
-    return int(row["c"]) if row else 0
+        async with con.transaction():
+            async for r in con.cursor("select tg_id from public.users", prefetch=batch):
+                yield r["tg_id"]
 
 async def list_all_user_ids() -> List[int]:
-    async with get_con() as con:
-        rows = await con.fetch("select tg_id from public.users")
-    return [int(r["tg_id"]) for r in rows]
+    return [tg_id async for tg_id in iter_all_user_ids()]
 
 
 # --- i18n helpers ------------------------------------------------------------
 
 async def get_language(tg_id: int) -> str | None:
+    hit = _cache_get(_language_cache, tg_id)
+    if hit is not None:
+        return hit[1]
     async with get_con() as con:
-        row = await con.fetchrow(
-            "SELECT language FROM public.users WHERE tg_id = $1",
-            tg_id
-        )
-    return (row["language"] if row and row["language"] else None)
+        row = await (await get_prepared(con, "users.get_language")).fetchrow(tg_id)
+    lang = (row["language"] if row and row["language"] else None)
+    _cache_put(_language_cache, tg_id, lang)
+    return lang
+
+async def list_user_languages(limit: int) -> List[Tuple[int, str]]:
+    """
+    (tg_id, language) for the `limit` most recently seen users with a saved
+    language, newest first; used to warm the i18n cache at startup.
+    """
+    rows = await pool_sync().fetch(
+        """
+        SELECT tg_id, language FROM public.users
+        WHERE language IS NOT NULL AND language <> ''
+        ORDER BY last_seen_at DESC NULLS LAST
+        LIMIT $1
+        """,
+        limit,
+    )
+    return [(r["tg_id"], r["language"]) for r in rows]
 
 async def set_language(tg_id: int, lang: str) -> None:
-    async with get_con() as con:
-        await con.execute(
-            """
-            INSERT INTO public.users (tg_id, language, updated_at)
-            VALUES ($1, $2, now())
-            ON CONFLICT (tg_id) DO UPDATE
-              SET language  = EXCLUDED.language,
-                  updated_at = now()
-            """,
-            tg_id, lang
-        )
+    await pool_sync().execute(
+        """
+        INSERT INTO public.users (tg_id, language, updated_at)
+        VALUES ($1, $2, now())
+        ON CONFLICT (tg_id) DO UPDATE
+          SET language  = EXCLUDED.language,
+              updated_at = now()
+        """,
+        tg_id, lang
+    )
+    _language_cache.pop(tg_id, None)
@@ -3,7 +3,8 @@ from __future__ import annotations
 
 import os
 import logging
-from typing import Optional
+from datetime import date
+from typing import Dict, Optional, Tuple, Union
 
 import asyncpg
 
@@ -12,7 +13,99 @@ logger = logging.getLogger(__name__)
 # Global pool
 pool: Optional[asyncpg.Pool] = None
 
-DB_DSN = os.getenv("SUPABASE_DB_URL") or os.getenv("DATABASE_URL")
+# Try DATABASE_URL first, then fall back to SUPABASE_DB_URL
+DB_DSN = os.getenv("DATABASE_URL") or os.getenv("SUPABASE_DB_URL")
+
+# Pool sizing: keep enough warm connections for steady-state concurrency so
+# bursts don't pay connect/TLS cost; recycle idle and long-lived ones.
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "10"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "50"))
+
+
+# Postgres stores dates as days since 2000-01-01; +/-infinity are the int32
+# extremes. They round-trip as the strings 'infinity' / '-infinity' (what
+# Postgres prints), and date.max / date.min encode to them like asyncpg's
+# own codec.
+_PG_EPOCH_ORDINAL = date(2000, 1, 1).toordinal()
+_PG_DATE_INFINITY = 2**31 - 1
+_PG_DATE_NEG_INFINITY = -(2**31)
+
+
+def _encode_date(value: Union[date, str]) -> Tuple[int]:
+    if isinstance(value, str):
+        if value == "infinity":
+            return (_PG_DATE_INFINITY,)
+        if value == "-infinity":
+            return (_PG_DATE_NEG_INFINITY,)
+        value = date.fromisoformat(value)
+    if value == date.max:
+        return (_PG_DATE_INFINITY,)
+    if value == date.min:
+        return (_PG_DATE_NEG_INFINITY,)
+    return (value.toordinal() - _PG_EPOCH_ORDINAL,)
+
+
+def _decode_date(value: Tuple[int]) -> str:
+    days = value[0]
+    if days == _PG_DATE_INFINITY:
+        return "infinity"
+    if days == _PG_DATE_NEG_INFINITY:
+        return "-infinity"
+    return date.fromordinal(days + _PG_EPOCH_ORDINAL).isoformat()
+
+
+# -------- prepared statements for hot single-row lookups ---------------------
+# Repositories register (name, sql) at import time; every pooled connection
+# prepares them once in _init_connection and keeps the PreparedStatement on
+# itself. get_prepared() also covers statements registered after a
+# connection was opened.
+
+_PREPARED_SQL: Dict[str, str] = {}
+
+
+class PreparedConnection(asyncpg.Connection):
+    """asyncpg connection that carries its own prepared statements."""
+
+    __slots__ = ("_prepared",)
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._prepared: Dict[str, asyncpg.prepared_stmt.PreparedStatement] = {}
+
+
+def register_prepared(name: str, sql: str) -> None:
+    _PREPARED_SQL[name] = sql
+
+
+async def get_prepared(con: PreparedConnection, name: str) -> asyncpg.prepared_stmt.PreparedStatement:
+    stmt = con._prepared.get(name)
+    if stmt is None:
+        stmt = await con.prepare(_PREPARED_SQL[name])
+        con._prepared[name] = stmt
+    return stmt
+
+
+async def _init_connection(con: PreparedConnection) -> None:
+    """
+    Per-connection setup: `date` columns decode straight to 'YYYY-MM-DD'
+    strings (what every reader and chart wants; +/-infinity come back as
+    'infinity' / '-infinity'); parameters accept either a date or such a
+    string. Binary format, so COPY keeps working.
+    Then prepare the registered hot statements.
+    """
+    await con.set_type_codec(
+        "date",
+        schema="pg_catalog",
+        encoder=_encode_date,
+        decoder=_decode_date,
+        format="tuple",
+    )
+    for name, sql in _PREPARED_SQL.items():
+        try:
+            con._prepared[name] = await con.prepare(sql)
+        except Exception as e:
+            # Leave it to get_prepared(); a bad statement must not break the pool.
+            logger.warning("prepare %s failed: %s", name, e)
 
 
 async def init_db() -> None:
@@ -21,9 +114,19 @@ async def init_db() -> None:
     if pool is not None:
         return
     if not DB_DSN:
-        raise RuntimeError("SUPABASE_DB_URL (or DATABASE_URL) is required for Postgres")
+        raise RuntimeError("DATABASE_URL / SUPABASE_DB_URL is not set")
     logger.info("Connecting to database...")
-    pool = await asyncpg.create_pool(dsn=DB_DSN, min_size=1, max_size=10)
+    pool = await asyncpg.create_pool(
+        dsn=DB_DSN,
+        min_size=DB_POOL_MIN,
+        max_size=max(DB_POOL_MAX, DB_POOL_MIN),
+        max_inactive_connection_lifetime=300,
+        max_queries=50_000,
+        statement_cache_size=1024,
+        command_timeout=60,
+        connection_class=PreparedConnection,
+        init=_init_connection,
+    )
     logger.info("Database pool ready.")
 
 
@@ -36,9 +139,19 @@ async def close_db() -> None:
 
 
 async def get_pool() -> asyncpg.Pool:
-    """Return active pool or raise if not initialized."""
+    """Return the global pool; initialize it if needed."""
     if pool is None:
-        raise RuntimeError("DB pool is not initialized. Call init_db() first.")
+        await init_db()
+    return pool
+
+
+def pool_sync() -> asyncpg.Pool:
+    """
+    Return the global pool without awaiting. For hot paths that run after
+    init_db(); raises if the pool has not been created yet.
+    """
+    if pool is None:
+        raise RuntimeError("Database pool is not initialized; call init_db() first")
     return pool
 
 
@@ -51,19 +164,23 @@ class ConnectionContext:
             await con.fetch("SELECT 1")
     """
 
+    __slots__ = ("_pool", "_con")
+
     def __init__(self) -> None:
+        self._pool: Optional[asyncpg.Pool] = None
         self._con: Optional[asyncpg.Connection] = None
 
     async def __aenter__(self) -> asyncpg.Connection:
-        p = await get_pool()
-        self._con = await p.acquire()
+        # Only the very first call has to await init; after that the pool is
+        # a plain global read. Keep it so __aexit__ releases to the same pool.
+        self._pool = pool if pool is not None else await get_pool()
+        self._con = await self._pool.acquire()
         return self._con
 
     async def __aexit__(self, exc_type, exc, tb) -> None:
         if self._con is None:
             return
-        p = await get_pool()
-        await p.release(self._con)
+        await self._pool.release(self._con)
         self._con = None
 
 
@@ -1,8 +1,20 @@
 import json
 import os
-from typing import Any, Dict, Optional, Callable
+import string
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+from collections.abc import Mapping
+from typing import Any, Dict, Optional, Callable, Union
+
+try:  # optional C JSON decoder
+    import orjson as _orjson
+except Exception:
+    _orjson = None
 
 # -------- cache & resolver (fast + sync) -------------------------------------
+# Bounded like the repository caches: once full, the least recently stored
+# user is evicted (dicts keep insertion order).
+_LANG_CACHE_MAX = 100_000
 _lang_cache: Dict[int, str] = {}          # user_id -> "en"/"fr"
 _lang_resolver: Optional[Callable[[int], Optional[str]]] = None  # optional custom resolver
 
@@ -10,6 +22,9 @@ def remember_language(user_id: int, lang: Optional[str]) -> None:
     """Remember language in-memory for instant lookups."""
     if not user_id or not lang:
         return
+    _lang_cache.pop(user_id, None)
+    if len(_lang_cache) >= _LANG_CACHE_MAX:
+        del _lang_cache[next(iter(_lang_cache))]
     _lang_cache[user_id] = lang
 
 def forget_language(user_id: int) -> None:
@@ -20,76 +35,137 @@ def set_language_resolver(resolver: Callable[[int], Optional[str]]) -> None:
     global _lang_resolver
     _lang_resolver = resolver
 
+# -------- template precompilation --------------------------------------------
+# Each catalog string is parsed once at load time. Strings without fields are
+# stored already unescaped ('{{' -> '{'); strings with plain `{name}` fields
+# become a closure that joins the literal parts with the values; anything
+# fancier ({x:>3}, {x!r}, {a.b}, {0}) keeps str.format. Same output and same
+# "return the raw text on error" behaviour as text.format(**kwargs).
+
+_FORMATTER = string.Formatter()
+Compiled = Union[str, Callable[[Dict[str, Any]], str]]
+
+def _compile_template(text: str) -> Compiled:
+    try:
+        parsed = list(_FORMATTER.parse(text))
+    except ValueError:
+        return text  # malformed braces: .format() would fail, so it stays raw
+    if all(field is None for _, field, _, _ in parsed):
+        return "".join(lit for lit, _, _, _ in parsed)
+
+    if all(
+        field is None or (field.isidentifier() and not spec and conv is None)
+        for _, field, spec, conv in parsed
+    ):
+        parts = tuple((lit, field) for lit, field, _, _ in parsed)
+
+        def render(kw: Dict[str, Any]) -> str:
+            try:
+                return "".join([
+                    lit if field is None else lit + format(kw[field])
+                    for lit, field in parts
+                ])
+            except Exception:
+                return text
+        return render
+
+    def render_format(kw: Dict[str, Any]) -> str:
+        try:
+            return text.format(**kw)
+        except Exception:
+            return text
+    return render_format
+
+def _read_catalog(path: str) -> Dict[str, Any]:
+    with open(path, "rb") as f:
+        raw = f.read()
+    if _orjson is not None:
+        return _orjson.loads(raw)
+    return json.loads(raw.decode("utf-8"))
+
+def _flatten(node: Dict[str, Any], prefix: str, out: Dict[str, Compiled]) -> None:
+    for k, v in node.items():
+        key = f"{prefix}{k}"
+        if isinstance(v, dict):
+            _flatten(v, key + ".", out)
+        elif isinstance(v, str):
+            out[key] = _compile_template(v)
+
 # -------- i18n core ----------------------------------------------------------
 class I18n:
     def __init__(self, locales_dir: str, default_lang: str = "en", repositories=None):
         self.locales_dir = locales_dir
         self.default_lang = default_lang
         self.repositories = repositories   # optional: expects .users.get_language(user_id) (sync) if provided
-        self._catalogs: Dict[str, Dict[str, Any]] = {}
+        # lang -> {"dotted.key": compiled template}; a read-only view,
+        # replaced wholesale by load()
+        self._compiled: Mapping[str, Mapping[str, Compiled]] = MappingProxyType({})
         self.load()
 
     def load(self) -> None:
-        """(Re)load all locale files."""
-        self._catalogs.clear()
+        """(Re)load all locale files (read in parallel, then frozen)."""
         if not os.path.isdir(self.locales_dir):
+            self._compiled = MappingProxyType({})
             return
-        for fname in os.listdir(self.locales_dir):
-            if not fname.endswith(".json"):
-                continue
+        names = [f for f in os.listdir(self.locales_dir) if f.endswith(".json")]
+        paths = [os.path.join(self.locales_dir, f) for f in names]
+        with ThreadPoolExecutor(max_workers=max(1, min(8, len(paths)))) as pool:
+            loaded = list(pool.map(_read_catalog, paths))
+
+        compiled: Dict[str, Mapping[str, Compiled]] = {}
+        for fname, catalog in zip(names, loaded):
             lang = fname.split(".")[0]
-            path = os.path.join(self.locales_dir, fname)
-            with open(path, "r", encoding="utf-8") as f:
-                self._catalogs[lang] = json.load(f)
-
-    def _lookup(self, lang: str, key: str) -> Optional[str]:
-        node: Any = self._catalogs.get(lang, {})
-        for part in key.split("."):
-            if isinstance(node, dict):
-                node = node.get(part)
-            else:
-                return None
-        return node if isinstance(node, str) else None
+            flat: Dict[str, Compiled] = {}
+            _flatten(catalog, "", flat)
+            compiled[lang] = MappingProxyType(flat)
+        # Publish a complete, immutable snapshot in one assignment
+        self._compiled = MappingProxyType(compiled)
 
     def translate(self, key: str, lang: Optional[str] = None, **kwargs) -> str:
-        lang = lang or self.default_lang
-        text = self._lookup(lang, key)
-        if text is None and lang != self.default_lang:
-            text = self._lookup(self.default_lang, key)
-        if text is None:
+        return self._t_fast(key, lang or self.default_lang, kwargs)
+
+    def _t_fast(self, key: str, lang: str, kwargs: Dict[str, Any]) -> str:
+        entry = self._compiled.get(lang, {}).get(key)
+        if entry is None and lang != self.default_lang:
+            entry = self._compiled.get(self.default_lang, {}).get(key)
+        if entry is None:
             # fallback to key so missing strings are obvious in dev
-            text = key
-        try:
-            return text.format(**kwargs)
-        except Exception:
-            return text
+            entry = _compile_template(key)
+        if isinstance(entry, str):
+            return entry
+        return entry(kwargs)
 
     def t(self, key: str, user_id: Optional[int] = None, lang: Optional[str] = None, **kwargs) -> str:
         # Resolution order:
         # 1) explicit lang param
-        # 2) in-memory cache
+        # 2) in-memory cache (preloaded at startup, see preload_languages)
         # 3) optional sync resolver set via set_language_resolver()
         # 4) optional repositories.users.get_language(user_id) IF it is sync
-        resolved: Optional[str] = lang
-        if resolved is None and user_id is not None:
-            # cache
-            resolved = _lang_cache.get(user_id)
-            # external resolver
-            if resolved is None and _lang_resolver is not None:
-                try:
-                    resolved = _lang_resolver(user_id)
-                except Exception:
-                    resolved = None
-            # repositories (only if sync function is provided)
-            if resolved is None and self.repositories:
-                try:
-                    maybe = self.repositories.users.get_language(user_id)
-                    # ignore coroutine objects (async funcs) to avoid blocking loop
-                    if not hasattr(maybe, "__await__"):
-                        resolved = maybe
-                except Exception:
-                    resolved = None
-        return self.translate(key, lang=resolved, **kwargs)
+        if lang is None and user_id is not None:
+            lang = _lang_cache.get(user_id)
+            if lang is None:
+                return self._t_slow(key, user_id, kwargs)
+        return self._t_fast(key, lang or self.default_lang, kwargs)
+
+    def _t_slow(self, key: str, user_id: int, kwargs: Dict[str, Any]) -> str:
+        """Cold user: try the resolver / sync repository before the default."""
+        resolved: Optional[str] = None
+        # external resolver
+        if _lang_resolver is not None:
+            try:
+                resolved = _lang_resolver(user_id)
+            except Exception:
+                resolved = None
+        # repositories (only if sync function is provided)
+        if resolved is None and self.repositories:
+            try:
+                maybe = self.repositories.users.get_language(user_id)
+                # ignore coroutine objects (async funcs) to avoid blocking loop
+                if not hasattr(maybe, "__await__"):
+                    resolved = maybe
+            except Exception:
+                resolved = None
+        return self._t_fast(key, resolved or self.default_lang, kwargs)
 
 # ---- module-level helpers for easy import ----
 _i18n: Optional[I18n] = None
@@ -100,6 +176,21 @@ def init_i18n(repositories=None, default_lang: str = "en") -> I18n:
     _i18n = I18n(locales_dir=locales_dir, default_lang=default_lang, repositories=repositories)
     return _i18n
 
+async def preload_languages() -> int:
+    """
+    Fill the in-memory language cache from users.language so t() takes the
+    fast path for known users right after startup. Only the most recently
+    seen _LANG_CACHE_MAX users are loaded. Returns how many were loaded.
+    """
+    from app.repositories.users import list_user_languages
+    loaded = 0
+    # Oldest first, so the most recent users are the last to be evicted.
+    for user_id, lang in reversed(await list_user_languages(_LANG_CACHE_MAX)):
+        if user_id not in _lang_cache:
+            remember_language(user_id, lang)
+            loaded += 1
+    return loaded
+
 def t(key: str, user_id: Optional[int] = None, lang: Optional[str] = None, **kwargs) -> str:
     global _i18n
     if _i18n is None:
@@ -1,70 +1,96 @@
 # backend/app/services/payments.py
 from __future__ import annotations
 
-from typing import Dict, Any, List
+import functools
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, List, Mapping, Tuple
 from aiogram.types import LabeledPrice
 
 from app.repositories.plans import get_plan_by_code
 from app.services.owners import is_owner
 
+
+@dataclass(frozen=True, slots=True)
+class Plan:
+    """A purchasable plan; mirrors a public.plans row."""
+    code: str
+    title: str
+    description: str
+    price_stars: int
+    duration_days: int
+    is_active: bool = True
+
+    @classmethod
+    def from_row(cls, row: Mapping[str, Any]) -> "Plan":
+        return cls(
+            code=row["code"],
+            title=row.get("title") or row["code"],
+            description=row.get("description") or "",
+            price_stars=int(row.get("price_stars") or 0),
+            duration_days=int(row.get("duration_days") or 0),
+            is_active=bool(row.get("is_active")),
+        )
+
+
 # Fallbacks used when DB has no plans yet
-PLANS_FALLBACK: Dict[str, Dict[str, Any]] = {
-    "PRO_WEEK": {
-        "code": "PRO_WEEK",
-        "title": "Pro (7 days)",
-        "description": "Unlock Force Join + advanced analytics + reports for a week",
-        "price_stars": 80,
-        "duration_days": 7,
-        "is_active": True,
-    },
-    "PRO_MONTH": {
-        "code": "PRO_MONTH",
-        "title": "Pro (30 days)",
-        "description": "Unlock Force Join + advanced analytics + reports",
-        "price_stars": 300,
-        "duration_days": 30,
-        "is_active": True,
-    },
-    "PRO_YEAR": {
-        "code": "PRO_YEAR",
-        "title": "Pro (365 days)",
-        "description": "Unlock Force Join + advanced analytics + reports",
-        "price_stars": 3000,
-        "duration_days": 365,
-        "is_active": True,
-    },
-}
+PLANS_FALLBACK: Mapping[str, Plan] = MappingProxyType({
+    "PRO_WEEK": Plan(
+        code="PRO_WEEK",
+        title="Pro (7 days)",
+        description="Unlock Force Join + advanced analytics + reports for a week",
+        price_stars=80,
+        duration_days=7,
+    ),
+    "PRO_MONTH": Plan(
+        code="PRO_MONTH",
+        title="Pro (30 days)",
+        description="Unlock Force Join + advanced analytics + reports",
+        price_stars=300,
+        duration_days=30,
+    ),
+    "PRO_YEAR": Plan(
+        code="PRO_YEAR",
+        title="Pro (365 days)",
+        description="Unlock Force Join + advanced analytics + reports",
+        price_stars=3000,
+        duration_days=365,
+    ),
+})
+
+_OWNER_FREE_PLAN = Plan(
+    code="OWNER_PRO",
+    title="Pro (Owner Free)",
+    description="All features unlocked for bot owner",
+    price_stars=0,
+    duration_days=36500,  # ~100 years
+)
 
-def _owner_free_plan() -> Dict[str, Any]:
-    return {
-        "code": "OWNER_PRO",
-        "title": "Pro (Owner Free)",
-        "description": "All features unlocked for bot owner",
-        "price_stars": 0,
-        "duration_days": 36500,  # ~100 years
-        "is_active": True,
-    }
+@functools.cache
+def _prices_for(plan: Plan) -> Tuple[LabeledPrice, ...]:
+    # Plans are frozen and compare by value, so every invoice for the same
+    # plan (fallback or identical DB row) shares one LabeledPrice. Only a
+    # handful of distinct plans ever exist, so the cache stays tiny.
+    return (LabeledPrice(label=plan.title or plan.code or "Pro", amount=plan.price_stars),)
 
-def stars_labeled_prices(plan: Dict[str, Any]) -> List[LabeledPrice]:
+def stars_labeled_prices(plan: Plan) -> List[LabeledPrice]:
     """
     Convert a plan into Telegram LabeledPrice for Stars payments.
     """
-    label = plan.get("title") or plan.get("code") or "Pro"
-    amount = int(plan.get("price_stars") or 0)
-    return [LabeledPrice(label=label, amount=amount)]
+    return list(_prices_for(plan))
 
 
-async def get_plan_resolved(plan_code: str, user_id: int | None = None) -> Dict[str, Any]:
+async def get_plan_resolved(plan_code: str, user_id: int | None = None) -> Plan:
     """
     Resolve plan from DB; if missing/inactive, fallback to in-memory defaults.
     Bot owner bypasses payment and always receives a free Pro plan.
     """
     if user_id is not None and is_owner(user_id):
-        return _owner_free_plan()
+        return _OWNER_FREE_PLAN
 
     db_plan = await get_plan_by_code(plan_code)
     if db_plan and db_plan.get("is_active"):
-        return db_plan
+        return Plan.from_row(db_plan)
 
     # Fallbacks
     return PLANS_FALLBACK.get(plan_code, PLANS_FALLBACK["PRO_MONTH"])
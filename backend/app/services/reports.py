@@ -1,26 +1,24 @@
 # backend/app/services/reports.py
 from __future__ import annotations
-from typing import Tuple, List, Optional
+from typing import Tuple, List, Optional, Sequence
 from datetime import datetime, timedelta, timezone
-import io
+import tempfile
 import asyncio
 import logging
 
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-from matplotlib.backends.backend_pdf import PdfPages
-from matplotlib.patches import FancyBboxPatch
+import numpy as np
+import matplotlib
+
+matplotlib.use("Agg")  # headless; skip GUI backend detection
+matplotlib.rcParams["pdf.compression"] = 9  # smaller uploads for a little CPU
+
+import matplotlib.dates as mdates  # noqa: E402
+from matplotlib.backends.backend_pdf import PdfPages  # noqa: E402
+from matplotlib.figure import Figure  # noqa: E402
+from matplotlib.patches import FancyBboxPatch  # noqa: E402
 
 from app.services.i18n import t
-from app.repositories.stats import get_last_days
-from app.repositories.activity import (
-    get_messages_daily,
-    get_dau_daily,
-    get_top_talkers,
-    get_peak_hour,
-    get_most_active_user,
-)
-from app.repositories.campaigns_read import get_top_campaigns_30d
+from app.repositories.reports import ReportBundle, get_report_bundle
 
 # Quiet the “categorical units” noise
 logging.getLogger("matplotlib.category").setLevel(logging.WARNING)
@@ -28,6 +26,7 @@ logging.getLogger("matplotlib.category").setLevel(logging.WARNING)
 # ---------- layout + style helpers ----------
 
 _A4_LANDSCAPE = (11.69, 8.27)  # inches
+_PDF_SPOOL_MAX = 4 * 1024 * 1024  # bytes kept in memory before spilling to disk
 CARD_BG = "#F7FAFC"
 CARD_EDGE = "#E2E8F0"
 DELTA_UP = "#16a34a"
@@ -35,8 +34,11 @@ DELTA_DOWN = "#dc2626"
 TEXT_MUTED = "#4B5563"
 
 
-def _new_fig() -> plt.Figure:
-    return plt.figure(figsize=_A4_LANDSCAPE, dpi=120)
+def _new_fig() -> Figure:
+    # A bare Figure, not pyplot: no global figure manager, and safe to use
+    # from a worker thread. Constrained layout is solved at draw time, so no
+    # per-page tight_layout() pass; it survives fig.clear().
+    return Figure(figsize=_A4_LANDSCAPE, dpi=120, layout="constrained")
 
 
 def _style_axes(ax, title: str, xlabel: Optional[str] = None, ylabel: Optional[str] = None):
@@ -55,28 +57,33 @@ def _thin_xticks_dates(ax, max_ticks: int = 10):
     ax.xaxis.set_major_formatter(formatter)
 
 
-def _parse_days(days_str: List[str]) -> List[datetime]:
-    out: List[datetime] = []
-    for s in days_str:
-        try:
-            out.append(datetime.strptime(s, "%Y-%m-%d"))
-        except Exception:
-            out.append(datetime.utcnow())
-    return out
+def _parse_days(days_str: Sequence[str]) -> np.ndarray:
+    # The DB layer hands us 'YYYY-MM-DD'; numpy parses the whole column in C
+    # and matplotlib plots datetime64 directly. A malformed day should raise.
+    return np.array(days_str, dtype="datetime64[D]")
+
+
+def _columns(rows: List[tuple], width: int) -> Tuple[np.ndarray, ...]:
+    """
+    (day, count, ...) rows -> (days, counts, ...) numpy columns: one
+    datetime64 array and `width - 1` int64 arrays, in the input order.
+    """
+    if not rows:
+        return (np.array([], dtype="datetime64[D]"),) + tuple(
+            np.array([], dtype=np.int64) for _ in range(width - 1)
+        )
+    cols = list(zip(*rows))
+    return (_parse_days(cols[0]),) + tuple(np.array(c, dtype=np.int64) for c in cols[1:])
 
 
 def _pct_delta(curr: float, prev: float) -> tuple[str, Optional[str]]:
     """Return (pretty_text, color) where color is green/red or None if no change."""
-    if prev <= 0 and curr <= 0:
-        return "0%", None
-    if prev <= 0 and curr > 0:
-        return "+100%", DELTA_UP
-    change = (curr - prev) / max(prev, 1e-9) * 100.0
-    if abs(change) < 0.5:
+    if prev <= 0:
+        return ("+100%", DELTA_UP) if curr > 0 else ("0%", None)
+    change = (curr - prev) * 100.0 / prev
+    if -0.5 < change < 0.5:
         return "0%", None
-    sign = "+" if change > 0 else ""
-    color = DELTA_UP if change > 0 else DELTA_DOWN
-    return f"{sign}{change:.0f}%", color
+    return f"{change:+.0f}%", (DELTA_UP if change > 0 else DELTA_DOWN)
 
 
 def _draw_kpi_cards(ax, items: List[dict]):
@@ -188,44 +195,53 @@ async def build_report_pdf_bytes(
     window_days = max(7, min(int(days or 30), 30))
 
     # For deltas we fetch double windows (recent vs previous)
-    jl60_task = get_last_days(chat_id, window_days * 2)
-    msg60_task = get_messages_daily(chat_id, 60)
-    dau60_task = get_dau_daily(chat_id, 60)
-    top5_task = get_top_talkers(chat_id, days=30, limit=5)
-    camp_task = get_top_campaigns_30d(chat_id, limit=10)
-    peak_task = get_peak_hour(chat_id, days=30, tz=tz)
-    topu_task = get_most_active_user(chat_id, days=30)
-
-    (jl60, msg60, dau60, top5, top_camp, peak_info, top_user) = await asyncio.gather(
-        jl60_task, msg60_task, dau60_task, top5_task, camp_task, peak_task, topu_task
+    bundle = await get_report_bundle(chat_id, window_days, tz)
+
+    # Rendering is CPU-bound (hundreds of ms); keep it off the event loop.
+    return await asyncio.to_thread(
+        _build_report_pdf_sync, chat_id, chat_title, window_days, bundle, user_id, lang
     )
 
+
+def _build_report_pdf_sync(
+    chat_id: int,
+    chat_title: str | None,
+    window_days: int,
+    bundle: ReportBundle,
+    user_id: Optional[int],
+    lang: Optional[str],
+) -> Tuple[bytes, str]:
+    """
+    Compute the KPIs and render the PDF from already-fetched data. Runs in a
+    worker thread (see build_report_pdf_bytes), so no pyplot and no awaits.
+    """
+    top5, top_camp = bundle.top_talkers, bundle.top_campaigns
+    peak_info, top_user = bundle.peak_hour, bundle.top_user
+
     # Split into current window and previous window (newest-first input)
-    jl_curr, jl_prev = jl60[:window_days], jl60[window_days : window_days * 2]
-    msg_curr, msg_prev = msg60[:30], msg60[30:60]
-    dau_curr, dau_prev = dau60[:30], dau60[30:60]
+    jl_days, jl_joins, jl_leaves = _columns(bundle.joins_leaves, 3)
+    msg_days, msg_counts = _columns(bundle.messages, 2)
+    dau_days, dau_counts = _columns(bundle.dau, 2)
+    curr, prev = slice(0, window_days), slice(window_days, window_days * 2)
+    dau_curr, dau_prev = dau_counts[:30], dau_counts[30:60]
 
     # KPIs current
-    total_joins = sum(int(j) for _, j, _ in jl_curr)
-    total_leaves = sum(int(l) for _, _, l in jl_curr)
+    total_joins = int(jl_joins[curr].sum())
+    total_leaves = int(jl_leaves[curr].sum())
     net_growth = total_joins - total_leaves
-    total_msgs = sum(int(c) for _, c in msg_curr) if msg_curr else 0
-    avg_dau = (
-        round(sum(int(c) for _, c in dau_curr) / max(len(dau_curr), 1), 1) if dau_curr else 0.0
-    )
+    total_msgs = int(msg_counts[:30].sum())
+    avg_dau = round(float(dau_curr.mean()), 1) if dau_curr.size else 0.0
     peak_hour = f"{peak_info[0]:02d}" if peak_info else "—"
     peak_count = int(peak_info[1]) if peak_info else 0
     top_user_id = top_user[0] if top_user else None
     top_user_cnt = int(top_user[1]) if top_user else 0
 
     # KPIs previous
-    prev_joins = sum(int(j) for _, j, _ in jl_prev) if jl_prev else 0
-    prev_leaves = sum(int(l) for _, _, l in jl_prev) if jl_prev else 0
+    prev_joins = int(jl_joins[prev].sum())
+    prev_leaves = int(jl_leaves[prev].sum())
     prev_net = prev_joins - prev_leaves
-    prev_msgs = sum(int(c) for _, c in msg_prev) if msg_prev else 0
-    prev_avgdau = (
-        round(sum(int(c) for _, c in dau_prev) / max(len(dau_prev), 1), 1) if dau_prev else 0.0
-    )
+    prev_msgs = int(msg_counts[30:60].sum())
+    prev_avgdau = round(float(dau_prev.mean()), 1) if dau_prev.size else 0.0
 
     # Deltas
     d_joins_txt, d_joins_col = _pct_delta(total_joins, prev_joins)
@@ -247,362 +263,325 @@ async def build_report_pdf_bytes(
         )
 
     now_utc = datetime.now(timezone.utc)
-    end_str = now_utc.strftime("%Y-%m-%d")
-    start_dt = now_utc - timedelta(days=window_days - 1)
-    start_str = start_dt.strftime("%Y-%m-%d")
-
-    pdf_buf = io.BytesIO()
-    with PdfPages(pdf_buf) as pdf:
-        # 1) Cover
-        fig = _new_fig()
-        ax = fig.add_subplot()
-        ax.axis("off")
-        ax.text(
-            0.05,
-            0.80,
-            t("reports.cover.title", user_id=user_id, lang=lang),
-            fontsize=28,
-            fontweight="bold",
-            transform=ax.transAxes,
-        )
-        ax.text(
-            0.05,
-            0.70,
-            t(
-                "reports.cover.subtitle",
-                user_id=user_id,
-                lang=lang,
-                start=start_str,
-                end=end_str,
-            ),
-            fontsize=14,
-            transform=ax.transAxes,
-        )
-        ax.text(
-            0.05,
-            0.62,
-            t(
-                "reports.cover.chat",
-                user_id=user_id,
-                lang=lang,
-                title=(chat_title or str(chat_id)),
-            ),
-            fontsize=13,
-            transform=ax.transAxes,
-        )
-        ax.text(
-            0.05,
-            0.54,
-            t(
-                "reports.cover.generated",
-                user_id=user_id,
-                lang=lang,
-                dt=now_utc.strftime("%Y-%m-%d %H:%M"),
-            ),
-            fontsize=11,
-            color="#555",
-            transform=ax.transAxes,
-        )
-        fig.tight_layout()
-        pdf.savefig(fig)
-        plt.close(fig)
-
-        # 2) KPI cards
-        fig = _new_fig()
-        ax = fig.add_subplot()
-        ax.text(
-            0.05,
-            0.92,
-            t("reports.kpi.title", user_id=user_id, lang=lang),
-            fontsize=18,
-            fontweight="bold",
-            transform=ax.transAxes,
-        )
-        items = [
-            dict(
-                label=t("reports.kpi.joins", user_id=user_id, lang=lang),
-                value=f"{total_joins:,}",
-                sublabel=t(
-                    "reports.kpi.window",
-                    user_id=user_id,
-                    lang=lang,
-                    n=window_days,
-                ),
-                delta_text=d_joins_txt,
-                delta_color=d_joins_col,
-            ),
-            dict(
-                label=t("reports.kpi.leaves", user_id=user_id, lang=lang),
-                value=f"{total_leaves:,}",
-                sublabel=t(
-                    "reports.kpi.window",
-                    user_id=user_id,
-                    lang=lang,
-                    n=window_days,
-                ),
-                delta_text=d_leaves_txt,
-                delta_color=d_leaves_col,
-            ),
-            dict(
-                label=t("reports.kpi.net", user_id=user_id, lang=lang),
-                value=f"{net_growth:,}",
-                sublabel=t(
-                    "reports.kpi.window",
+    today = now_utc.date()
+    end_str = today.isoformat()
+    start_str = (today - timedelta(days=window_days - 1)).isoformat()
+
+    # Labels that appear on several cards/pages: translate once.
+    joins_label = t("reports.kpi.joins", user_id=user_id, lang=lang)
+    leaves_label = t("reports.kpi.leaves", user_id=user_id, lang=lang)
+    window_label = t("reports.kpi.window", user_id=user_id, lang=lang, n=window_days)
+    day_label = t("reports.axis.day", user_id=user_id, lang=lang)
+    count_label = t("reports.axis.count", user_id=user_id, lang=lang)
+
+    # One figure for every page: clear() between pages instead of creating
+    # a new one each time.
+    fig = _new_fig()
+    # Small reports stay in memory; big ones spill to a temp file instead of
+    # growing a BytesIO next to the bytes we return.
+    with tempfile.SpooledTemporaryFile(max_size=_PDF_SPOOL_MAX, mode="w+b") as pdf_buf:
+        with PdfPages(pdf_buf) as pdf:
+            # 1) Cover
+            ax = fig.add_subplot()
+            ax.axis("off")
+            ax.text(
+                0.05,
+                0.80,
+                t("reports.cover.title", user_id=user_id, lang=lang),
+                fontsize=28,
+                fontweight="bold",
+                transform=ax.transAxes,
+            )
+            ax.text(
+                0.05,
+                0.70,
+                t(
+                    "reports.cover.subtitle",
                     user_id=user_id,
                     lang=lang,
-                    n=window_days,
+                    start=start_str,
+                    end=end_str,
                 ),
-                delta_text=d_net_txt,
-                delta_color=d_net_col,
-            ),
-            dict(
-                label=t("reports.kpi.messages", user_id=user_id, lang=lang),
-                value=f"{total_msgs:,}",
-                sublabel=t("reports.kpi.window30", user_id=user_id, lang=lang),
-                delta_text=d_msgs_txt,
-                delta_color=d_msgs_col,
-            ),
-            dict(
-                label=t("reports.kpi.avg_dau", user_id=user_id, lang=lang),
-                value=f"{avg_dau:,}",
-                sublabel=t(
-                    "reports.kpi.window30_users",
+                fontsize=14,
+                transform=ax.transAxes,
+            )
+            ax.text(
+                0.05,
+                0.62,
+                t(
+                    "reports.cover.chat",
                     user_id=user_id,
                     lang=lang,
+                    title=(chat_title or str(chat_id)),
                 ),
-                delta_text=d_dau_txt,
-                delta_color=d_dau_col,
-            ),
-            dict(
-                label=t("reports.kpi.peak_hour", user_id=user_id, lang=lang),
-                value=(f"{peak_hour}:00" if peak_info else "—"),
-                sublabel=(
-                    t(
-                        "reports.kpi.peak_count",
-                        user_id=user_id,
-                        lang=lang,
-                        n=peak_count,
-                    )
-                    if peak_info
-                    else ""
-                ),
-                delta_text=None,
-                delta_color=None,
-            ),
-        ]
-        _draw_kpi_cards(ax, items)
-
-        # top user (caption)
-        if top_user_id is not None:
+                fontsize=13,
+                transform=ax.transAxes,
+            )
             ax.text(
                 0.05,
-                0.06,
+                0.54,
                 t(
-                    "reports.kpi.top_user",
+                    "reports.cover.generated",
                     user_id=user_id,
                     lang=lang,
-                    top_user_id=top_user_id,
-                    count=top_user_cnt,
+                    dt=f"{now_utc:%Y-%m-%d %H:%M}",
                 ),
                 fontsize=11,
-                color=TEXT_MUTED,
+                color="#555",
                 transform=ax.transAxes,
             )
-        fig.tight_layout()
-        pdf.savefig(fig)
-        plt.close(fig)
-
-        # 2b) NEW: Engagement summary page
-        fig = _new_fig()
-        ax = fig.add_subplot()
-        ax.axis("off")
-        ax.text(
-            0.05,
-            0.90,
-            t("reports.eng.title", user_id=user_id, lang=lang),
-            fontsize=18,
-            fontweight="bold",
-            transform=ax.transAxes,
-        )
+            pdf.savefig(fig)
+            fig.clear()
 
-        lines = [
-            t(
-                "reports.eng.avg_joins_per_day",
-                user_id=user_id,
-                lang=lang,
-                value=f"{avg_joins_per_day:.1f}",
-            ),
-            t(
-                "reports.eng.avg_leaves_per_day",
-                user_id=user_id,
-                lang=lang,
-                value=f"{avg_leaves_per_day:.1f}",
-            ),
-            t(
-                "reports.eng.msgs_per_active_per_day",
-                user_id=user_id,
-                lang=lang,
-                value=f"{msgs_per_active_per_day:.2f}",
-            ),
-            t(
-                "reports.eng.msgs_per_join",
-                user_id=user_id,
-                lang=lang,
-                value=f"{msgs_per_join:.1f}",
-            ),
-        ]
-
-        y = 0.80
-        for line in lines:
+            # 2) KPI cards
+            ax = fig.add_subplot()
             ax.text(
-                0.07,
-                y,
-                f"• {line}",
-                fontsize=12,
+                0.05,
+                0.92,
+                t("reports.kpi.title", user_id=user_id, lang=lang),
+                fontsize=18,
+                fontweight="bold",
                 transform=ax.transAxes,
             )
-            y -= 0.06
-
-        fig.tight_layout()
-        pdf.savefig(fig)
-        plt.close(fig)
-
-        # 3) Joins vs Leaves
-        if jl_curr:
-            days_lbl = [d for d, *_ in jl_curr][::-1]
-            x = _parse_days(days_lbl)
-            joins_y = [int(j) for _, j, _ in jl_curr][::-1]
-            leaves_y = [int(l) for _, _, l in jl_curr][::-1]
-
-            fig = _new_fig()
-            ax = fig.add_subplot()
-            _style_axes(
-                ax,
-                t("reports.series.joins_leaves", user_id=user_id, lang=lang),
-                xlabel=t("reports.axis.day", user_id=user_id, lang=lang),
-                ylabel=t("reports.axis.count", user_id=user_id, lang=lang),
-            )
-            ax.plot(
-                x,
-                joins_y,
-                linewidth=2.2,
-                label=t("reports.kpi.joins", user_id=user_id, lang=lang),
-            )
-            ax.plot(
-                x,
-                leaves_y,
-                linewidth=2.2,
-                label=t("reports.kpi.leaves", user_id=user_id, lang=lang),
-            )
-            _thin_xticks_dates(ax, max_ticks=10)
-            fig.autofmt_xdate()
-            ax.legend()
-            fig.tight_layout()
-            pdf.savefig(fig)
-            plt.close(fig)
-
-        # 4) Messages
-        if msg_curr:
-            days_lbl = [d for d, _ in msg_curr][::-1]
-            x = _parse_days(days_lbl)
-            y = [int(c) for _, c in msg_curr][::-1]
-            fig = _new_fig()
-            ax = fig.add_subplot()
-            _style_axes(
-                ax,
-                t("reports.series.messages", user_id=user_id, lang=lang),
-                xlabel=t("reports.axis.day", user_id=user_id, lang=lang),
-                ylabel=t("reports.axis.count", user_id=user_id, lang=lang),
-            )
-            ax.plot(x, y, linewidth=2.2)
-            _thin_xticks_dates(ax, max_ticks=10)
-            fig.autofmt_xdate()
-            fig.tight_layout()
-            pdf.savefig(fig)
-            plt.close(fig)
-
-        # 5) DAU
-        if dau_curr:
-            days_lbl = [d for d, _ in dau_curr][::-1]
-            x = _parse_days(days_lbl)
-            y = [int(c) for _, c in dau_curr][::-1]
-            fig = _new_fig()
-            ax = fig.add_subplot()
-            _style_axes(
-                ax,
-                t("reports.series.dau", user_id=user_id, lang=lang),
-                xlabel=t("reports.axis.day", user_id=user_id, lang=lang),
-                ylabel=t("reports.axis.users", user_id=user_id, lang=lang),
-            )
-            ax.plot(x, y, linewidth=2.2)
-            _thin_xticks_dates(ax, max_ticks=10)
-            fig.autofmt_xdate()
-            fig.tight_layout()
-            pdf.savefig(fig)
-            plt.close(fig)
+            items = [
+                dict(
+                    label=joins_label,
+                    value=f"{total_joins:,}",
+                    sublabel=window_label,
+                    delta_text=d_joins_txt,
+                    delta_color=d_joins_col,
+                ),
+                dict(
+                    label=leaves_label,
+                    value=f"{total_leaves:,}",
+                    sublabel=window_label,
+                    delta_text=d_leaves_txt,
+                    delta_color=d_leaves_col,
+                ),
+                dict(
+                    label=t("reports.kpi.net", user_id=user_id, lang=lang),
+                    value=f"{net_growth:,}",
+                    sublabel=window_label,
+                    delta_text=d_net_txt,
+                    delta_color=d_net_col,
+                ),
+                dict(
+                    label=t("reports.kpi.messages", user_id=user_id, lang=lang),
+                    value=f"{total_msgs:,}",
+                    sublabel=t("reports.kpi.window30", user_id=user_id, lang=lang),
+                    delta_text=d_msgs_txt,
+                    delta_color=d_msgs_col,
+                ),
+                dict(
+                    label=t("reports.kpi.avg_dau", user_id=user_id, lang=lang),
+                    value=f"{avg_dau:,}",
+                    sublabel=t(
+                        "reports.kpi.window30_users",
+                        user_id=user_id,
+                        lang=lang,
+                    ),
+                    delta_text=d_dau_txt,
+                    delta_color=d_dau_col,
+                ),
+                dict(
+                    label=t("reports.kpi.peak_hour", user_id=user_id, lang=lang),
+                    value=(f"{peak_hour}:00" if peak_info else "—"),
+                    sublabel=(
+                        t(
+                            "reports.kpi.peak_count",
+                            user_id=user_id,
+                            lang=lang,
+                            n=peak_count,
+                        )
+                        if peak_info
+                        else ""
+                    ),
+                    delta_text=None,
+                    delta_color=None,
+                ),
+            ]
+            _draw_kpi_cards(ax, items)
 
-        # 6) Top campaigns
-        if top_camp:
-            labels = [name for name, _ in top_camp]
-            vals = [int(v) for _, v in top_camp]
-            fig = _new_fig()
-            ax = fig.add_subplot()
-            _style_axes(
-                ax,
-                t("reports.campaigns.title", user_id=user_id, lang=lang),
-                ylabel=t("reports.campaigns.ylabel", user_id=user_id, lang=lang),
-            )
-            ax.bar(labels, vals)
-            ax.tick_params(axis="x", rotation=30)
-            fig.tight_layout()
+            # top user (caption)
+            if top_user_id is not None:
+                ax.text(
+                    0.05,
+                    0.06,
+                    t(
+                        "reports.kpi.top_user",
+                        user_id=user_id,
+                        lang=lang,
+                        top_user_id=top_user_id,
+                        count=top_user_cnt,
+                    ),
+                    fontsize=11,
+                    color=TEXT_MUTED,
+                    transform=ax.transAxes,
+                )
             pdf.savefig(fig)
-            plt.close(fig)
+            fig.clear()
 
-        # 7) Top talkers
-        if top5:
-            fig = _new_fig()
+            # 2b) NEW: Engagement summary page
             ax = fig.add_subplot()
-            ax.set_title(
-                t("reports.top_talkers.title", user_id=user_id, lang=lang),
-                fontsize=14,
-                fontweight="bold",
-            )
             ax.axis("off")
-            headers = [
-                t("reports.top_talkers.header_user", user_id=user_id, lang=lang),
-                t("reports.top_talkers.header_msgs", user_id=user_id, lang=lang),
-            ]
-            y_text = 0.85
             ax.text(
-                0.06,
-                y_text,
-                f"{headers[0]:<18}  {headers[1]:>10}",
-                family="monospace",
-                fontsize=12,
-                transform=ax.transAxes,
-            )
-            y_text -= 0.03
-            ax.text(
-                0.06,
-                y_text,
-                "-" * 34,
-                family="monospace",
-                color="#666",
+                0.05,
+                0.90,
+                t("reports.eng.title", user_id=user_id, lang=lang),
+                fontsize=18,
+                fontweight="bold",
                 transform=ax.transAxes,
             )
-            for uid, total in top5:
-                y_text -= 0.05
+
+            lines = [
+                t(
+                    "reports.eng.avg_joins_per_day",
+                    user_id=user_id,
+                    lang=lang,
+                    value=f"{avg_joins_per_day:.1f}",
+                ),
+                t(
+                    "reports.eng.avg_leaves_per_day",
+                    user_id=user_id,
+                    lang=lang,
+                    value=f"{avg_leaves_per_day:.1f}",
+                ),
+                t(
+                    "reports.eng.msgs_per_active_per_day",
+                    user_id=user_id,
+                    lang=lang,
+                    value=f"{msgs_per_active_per_day:.2f}",
+                ),
+                t(
+                    "reports.eng.msgs_per_join",
+                    user_id=user_id,
+                    lang=lang,
+                    value=f"{msgs_per_join:.1f}",
+                ),
+            ]
+
+            y = 0.80
+            for line in lines:
                 ax.text(
-                    0.06,
-                    y_text,
-                    f"{str(uid):<18}  {total:>10}",
-                    family="monospace",
+                    0.07,
+                    y,
+                    f"• {line}",
                     fontsize=12,
                     transform=ax.transAxes,
                 )
-            fig.tight_layout()
-            pdf.savefig(fig)
-            plt.close(fig)
+                y -= 0.06
 
-    pdf_buf.seek(0)
-    return pdf_buf.read(), f"report_chat_{chat_id}.pdf"
+            pdf.savefig(fig)
+            fig.clear()
+
+            # 3) Joins vs Leaves
+            if len(jl_days):
+                # Newest-first columns; reversed views plot oldest-first.
+                x = jl_days[curr][::-1]
+                joins_y = jl_joins[curr][::-1]
+                leaves_y = jl_leaves[curr][::-1]
+
+                ax = fig.add_subplot()
+                _style_axes(
+                    ax,
+                    t("reports.series.joins_leaves", user_id=user_id, lang=lang),
+                    xlabel=day_label,
+                    ylabel=count_label,
+                )
+                ax.plot(
+                    x,
+                    joins_y,
+                    linewidth=2.2,
+                    label=joins_label,
+                )
+                ax.plot(
+                    x,
+                    leaves_y,
+                    linewidth=2.2,
+                    label=leaves_label,
+                )
+                _thin_xticks_dates(ax, max_ticks=10)
+                ax.legend()
+                pdf.savefig(fig)
+                fig.clear()
+
+            # 4) Messages
+            if len(msg_days):
+                x = msg_days[:30][::-1]
+                y = msg_counts[:30][::-1]
+                ax = fig.add_subplot()
+                _style_axes(
+                    ax,
+                    t("reports.series.messages", user_id=user_id, lang=lang),
+                    xlabel=day_label,
+                    ylabel=count_label,
+                )
+                ax.plot(x, y, linewidth=2.2)
+                _thin_xticks_dates(ax, max_ticks=10)
+                pdf.savefig(fig)
+                fig.clear()
+
+            # 5) DAU
+            if len(dau_days):
+                x = dau_days[:30][::-1]
+                y = dau_curr[::-1]
+                ax = fig.add_subplot()
+                _style_axes(
+                    ax,
+                    t("reports.series.dau", user_id=user_id, lang=lang),
+                    xlabel=day_label,
+                    ylabel=t("reports.axis.users", user_id=user_id, lang=lang),
+                )
+                ax.plot(x, y, linewidth=2.2)
+                _thin_xticks_dates(ax, max_ticks=10)
+                pdf.savefig(fig)
+                fig.clear()
+
+            # 6) Top campaigns
+            if top_camp:
+                labels = [name for name, _ in top_camp]
+                vals = [int(v) for _, v in top_camp]
+                ax = fig.add_subplot()
+                _style_axes(
+                    ax,
+                    t("reports.campaigns.title", user_id=user_id, lang=lang),
+                    ylabel=t("reports.campaigns.ylabel", user_id=user_id, lang=lang),
+                )
+                ax.bar(labels, vals)
+                ax.tick_params(axis="x", rotation=30)
+                pdf.savefig(fig)
+                fig.clear()
+
+            # 7) Top talkers
+            if top5:
+                ax = fig.add_subplot()
+                ax.set_title(
+                    t("reports.top_talkers.title", user_id=user_id, lang=lang),
+                    fontsize=14,
+                    fontweight="bold",
+                )
+                ax.axis("off")
+                headers = [
+                    t("reports.top_talkers.header_user", user_id=user_id, lang=lang),
+                    t("reports.top_talkers.header_msgs", user_id=user_id, lang=lang),
+                ]
+                table = ax.table(
+                    cellText=[[str(uid), f"{total:,}"] for uid, total in top5],
+                    colLabels=headers,
+                    colLoc="left",
+                    cellLoc="left",
+                    loc="upper left",
+                    bbox=[0.06, 0.45, 0.6, 0.4],
+                )
+                table.auto_set_font_size(False)
+                table.set_fontsize(12)
+                for (row, _col), cell in table.get_celld().items():
+                    cell.set_edgecolor(CARD_EDGE)
+                    if row == 0:
+                        cell.set_facecolor(CARD_BG)
+                        cell.set_text_props(fontweight="bold")
+                pdf.savefig(fig)
+                fig.clear()
+
+        pdf_buf.seek(0)
+        return pdf_buf.read(), f"report_chat_{chat_id}.pdf"
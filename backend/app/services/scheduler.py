@@ -1,5 +1,6 @@
 from __future__ import annotations
 import asyncio
+import logging
 import os
 from datetime import date
 from typing import List
@@ -7,18 +8,33 @@ from aiogram import Bot
 
 from app.repositories.chats import list_all_channels
 from app.repositories.stats import upsert_channel_member_count
+from app.repositories.tenants import refresh_tenant_stats
+
+log = logging.getLogger(__name__)
 
 SNAPSHOT_INTERVAL_MIN = int(os.getenv("CHANNEL_SNAPSHOT_EVERY_MIN", "30"))
+TENANT_STATS_REFRESH_SEC = int(os.getenv("TENANT_STATS_REFRESH_SEC", "300"))
+SNAPSHOT_CONCURRENCY = int(os.getenv("CHANNEL_SNAPSHOT_CONCURRENCY", "16"))
+
+async def _snapshot_one(bot: Bot, cid: int, day: date, sem: asyncio.Semaphore) -> None:
+    try:
+        async with sem:
+            count = await bot.get_chat_member_count(cid)
+        await upsert_channel_member_count(cid, day, int(count))
+    except Exception:
+        return
 
 async def snapshot_once(bot: Bot) -> None:
     try:
         channels: List[int] = await list_all_channels()
-        for cid in channels:
-            try:
-                count = await bot.get_chat_member_count(cid)
-                await upsert_channel_member_count(cid, date.today(), int(count))
-            except Exception:
-                continue
+        # Overlap the Telegram round trips; the semaphore keeps us under
+        # flood limits. One date for the whole snapshot.
+        today = date.today()
+        sem = asyncio.Semaphore(SNAPSHOT_CONCURRENCY)
+        await asyncio.gather(
+            *(_snapshot_one(bot, cid, today, sem) for cid in channels),
+            return_exceptions=True,
+        )
     except Exception:
         pass
 
@@ -27,3 +43,11 @@ async def start_channel_snapshot_loop(bot: Bot):
     while True:
         await asyncio.sleep(SNAPSHOT_INTERVAL_MIN * 60)
         await snapshot_once(bot)
+
+async def start_tenant_stats_refresh_loop():
+    while True:
+        try:
+            await refresh_tenant_stats()
+        except Exception as e:
+            log.warning("tenant_stats refresh failed: %s", e)
+        await asyncio.sleep(TENANT_STATS_REFRESH_SEC)
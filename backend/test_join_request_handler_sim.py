@@ -14,8 +14,7 @@ from dataclasses import dataclass
 
 from app.handlers.members import (
     _record_join_request_and_check_raid,
-    _REQ_HISTORY,
-    _REQ_RAID_UNTIL,
+    reset_raid_state,
 )
 
 
@@ -85,8 +84,7 @@ async def simulate_on_join_request(req: DummyReq, delay_for_approve: float = 0.0
 # --- Actual tests ----------------------------------------------------------
 
 async def test_bot_declined():
-    _REQ_HISTORY.clear()
-    _REQ_RAID_UNTIL.clear()
+    reset_raid_state()
 
     req = DummyReq(chat_id=-100111222333, user_id=1, is_bot=True)
     await simulate_on_join_request(req)
@@ -97,8 +95,7 @@ async def test_bot_declined():
 
 
 async def test_flood_declined():
-    _REQ_HISTORY.clear()
-    _REQ_RAID_UNTIL.clear()
+    reset_raid_state()
 
     chat_id = -100444555666
 
@@ -116,8 +113,7 @@ async def test_flood_declined():
 
 
 async def test_normal_human_approved():
-    _REQ_HISTORY.clear()
-    _REQ_RAID_UNTIL.clear()
+    reset_raid_state()
 
     chat_id = -100777888999
 
@@ -138,4 +134,9 @@ async def main():
 
 
 if __name__ == "__main__":
+    try:
+        import uvloop  # optional; faster event loop when installed
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
     asyncio.run(main())
@@ -12,4 +12,9 @@ async def main():
 
 
 if __name__ == "__main__":
+    try:
+        import uvloop  # optional; faster event loop when installed
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
     asyncio.run(main())
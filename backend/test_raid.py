@@ -1,11 +1,10 @@
-from app.handlers.members import _record_join_and_check_raid, _is_in_raid_mode, _JOIN_HISTORY, _RAID_MODE_UNTIL
+from app.handlers.members import _record_join_and_check_raid, _is_in_raid_mode, _JOIN_HISTORY, reset_raid_state
 
 def main():
     chat_id = -100999888777
 
     # reset state for clean test
-    _JOIN_HISTORY.clear()
-    _RAID_MODE_UNTIL.clear()
+    reset_raid_state()
 
     print("Simulating joins for chat:", chat_id)
 
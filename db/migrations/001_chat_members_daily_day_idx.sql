@@ -0,0 +1,6 @@
+-- db/migrations/001_chat_members_daily_day_idx.sql
+-- Covering index for get_last_days(): range scan on (chat_id, day) that
+-- returns joins/leaves without heap fetches.
+-- CONCURRENTLY cannot run inside a transaction block; apply with plain psql.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS chat_members_daily_chat_day_idx
+  ON public.chat_members_daily (chat_id, day DESC) INCLUDE (joins, leaves);
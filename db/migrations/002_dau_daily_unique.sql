@@ -0,0 +1,13 @@
+-- db/migrations/002_dau_daily_unique.sql
+-- inc_message_count() relies on ON CONFLICT (chat_id, date, user_id) for
+-- dau_daily. Drop duplicates left by the old WHERE NOT EXISTS insert, then
+-- add the unique index the conflict target needs.
+DELETE FROM public.dau_daily a
+USING public.dau_daily b
+WHERE a.chat_id = b.chat_id
+  AND a.date    = b.date
+  AND a.user_id = b.user_id
+  AND a.ctid    > b.ctid;
+
+CREATE UNIQUE INDEX IF NOT EXISTS dau_daily_chat_date_user_uidx
+  ON public.dau_daily (chat_id, date, user_id);
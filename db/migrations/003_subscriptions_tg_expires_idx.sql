@@ -0,0 +1,7 @@
+-- db/migrations/003_subscriptions_tg_expires_idx.sql
+-- Lets the "is Pro" checks (single and ANY($1::bigint[])) filter on
+-- expires_at > now() from the index alone. A partial index on now() is not
+-- allowed (not immutable), so expires_at is a key column instead.
+-- CONCURRENTLY cannot run inside a transaction block; apply with plain psql.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS subscriptions_tg_expires_idx
+  ON public.subscriptions (tg_id, expires_at);
@@ -0,0 +1,18 @@
+-- db/migrations/004_happened_at_brin.sql
+-- Append-only event tables: happened_at follows insert order, so a BRIN
+-- index covers the "last N days" windows of get_peak_hour(), the
+-- messages_by_user fallbacks and member_events at a fraction of a B-tree's
+-- size. autosummarize keeps new ranges summarized without a manual
+-- brin_summarize_new_values().
+-- CONCURRENTLY cannot run inside a transaction block; apply with plain psql.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS messages_by_user_happened_brin
+  ON public.messages_by_user USING BRIN (happened_at)
+  WITH (pages_per_range = 32, autosummarize = on);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS messages_stream_happened_brin
+  ON public.messages_stream USING BRIN (happened_at)
+  WITH (pages_per_range = 32, autosummarize = on);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS member_events_happened_brin
+  ON public.member_events USING BRIN (happened_at)
+  WITH (pages_per_range = 32, autosummarize = on);
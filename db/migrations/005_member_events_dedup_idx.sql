@@ -0,0 +1,8 @@
+-- db/migrations/005_member_events_dedup_idx.sql
+-- members._recent_member_event_exists() filters on
+-- chat_id = $1 AND tg_id = $2 AND kind = $3 AND happened_at >= $4 LIMIT 1.
+-- This index answers it with one short range scan; the BRIN from 004 keeps
+-- serving time-only windows.
+-- CONCURRENTLY cannot run inside a transaction block; apply with plain psql.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS member_events_chat_user_kind_time_idx
+  ON public.member_events (chat_id, tg_id, kind, happened_at DESC);
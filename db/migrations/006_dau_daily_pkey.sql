@@ -0,0 +1,17 @@
+-- db/migrations/006_dau_daily_pkey.sql
+-- Promote the unique index from 002 to the table's primary key, so
+-- ON CONFLICT in inc_message_count() resolves against the PK and the
+-- (chat_id, date, user_id) columns become NOT NULL.
+-- Skipped when dau_daily already has a primary key.
+DO $$
+BEGIN
+  IF NOT EXISTS (
+    SELECT 1 FROM pg_constraint
+    WHERE conrelid = 'public.dau_daily'::regclass AND contype = 'p'
+  ) THEN
+    ALTER TABLE public.dau_daily
+      ADD CONSTRAINT dau_daily_pkey PRIMARY KEY
+      USING INDEX dau_daily_chat_date_user_uidx;
+  END IF;
+END
+$$;
@@ -0,0 +1,10 @@
+-- db/migrations/008_required_targets_covering_idx.sql
+-- list_group_targets(): WHERE chat_id = $1 ORDER BY set_at, returning
+-- (target, join_url). list_required_targets(): ORDER BY added_at, returning
+-- target. Both become ordered index-only scans instead of an in-memory sort.
+-- CONCURRENTLY cannot run inside a transaction block; apply with plain psql.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS group_fj_chat_set_at_idx
+  ON public.group_force_join_requirements (chat_id, set_at) INCLUDE (target, join_url);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS required_membership_added_at_idx
+  ON public.required_membership (added_at) INCLUDE (target);
@@ -0,0 +1,10 @@
+-- db/migrations/009_tenant_latest_plan_idx.sql
+-- latest_plan CTE in the tenant listings:
+--   distinct on (ut.tenant_id) ... join subscriptions s on s.tg_id = ut.tg_id
+--   order by ut.tenant_id, s.started_at desc
+-- CONCURRENTLY cannot run inside a transaction block; apply with plain psql.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS subscriptions_tg_started_idx
+  ON public.subscriptions (tg_id, started_at DESC) INCLUDE (plan);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS user_tenants_tenant_idx
+  ON public.user_tenants (tenant_id) INCLUDE (tg_id);
@@ -0,0 +1,27 @@
+-- db/migrations/010_tenant_stats_mv.sql
+-- Per-tenant chat_count and latest plan, precomputed for the admin tenant
+-- list/search/export (repositories/tenants.py). Refreshed CONCURRENTLY by
+-- refresh_tenant_stats() on a timer (services/scheduler.py); updated_at
+-- shows how stale a row is. The unique index is what allows CONCURRENTLY.
+CREATE MATERIALIZED VIEW IF NOT EXISTS public.tenant_stats AS
+WITH latest_plan AS (
+  SELECT DISTINCT ON (ut.tenant_id) ut.tenant_id, s.plan
+  FROM public.user_tenants ut
+  JOIN public.subscriptions s ON s.tg_id = ut.tg_id
+  ORDER BY ut.tenant_id, s.started_at DESC
+),
+chat_counts AS (
+  SELECT tenant_id, count(*) AS chat_count
+  FROM public.chats
+  GROUP BY tenant_id
+)
+SELECT t.id AS tenant_id,
+       coalesce(cc.chat_count, 0)::int          AS chat_count,
+       lower(coalesce(lp.plan, 'inactive'))     AS plan,
+       now()                                    AS updated_at
+FROM public.tenants t
+LEFT JOIN chat_counts cc ON cc.tenant_id = t.id
+LEFT JOIN latest_plan lp ON lp.tenant_id = t.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS tenant_stats_tenant_idx
+  ON public.tenant_stats (tenant_id);
@@ -0,0 +1,6 @@
+-- db/migrations/011_tenants_created_id_idx.sql
+-- Keyset pagination in list_tenants_page_with_stats():
+--   (t.created_at, t.id) < / > cursor, order by created_at, id (both ways).
+-- CONCURRENTLY cannot run inside a transaction block; apply with plain psql.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS tenants_created_id_desc_idx
+  ON public.tenants (created_at DESC, id DESC);
@@ -0,0 +1,16 @@
+-- db/migrations/012_tenants_search_trgm.sql
+-- search_tenants_page_with_stats() matches q with unanchored ILIKE on
+-- name, owner_tg_id::text and id::text. Trigram GIN indexes let each of
+-- those predicates use an index. The expressions must stay exactly
+-- cast(<col> as text) with plain ILIKE (no lower()) to match the indexes.
+-- CONCURRENTLY cannot run inside a transaction block; apply with plain psql.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS tenants_name_trgm_idx
+  ON public.tenants USING gin (name gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS tenants_owner_txt_trgm_idx
+  ON public.tenants USING gin ((cast(owner_tg_id as text)) gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS tenants_id_txt_trgm_idx
+  ON public.tenants USING gin ((cast(id as text)) gin_trgm_ops);
@@ -0,0 +1,9 @@
+-- db/migrations/013_tenants_owner_unique.sql
+-- ensure_personal_tenant() upserts on owner_tg_id (ON CONFLICT needs a
+-- unique index). If this fails on existing duplicates, list them with
+--   select owner_tg_id, array_agg(id order by created_at)
+--   from public.tenants group by owner_tg_id having count(*) > 1;
+-- and merge by hand (chats / user_tenants point at tenant ids).
+-- CONCURRENTLY cannot run inside a transaction block; apply with plain psql.
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS tenants_owner_tg_id_uidx
+  ON public.tenants (owner_tg_id);